@@ -3,7 +3,19 @@
 from flask import Flask, render_template, request, session, redirect, url_for, send_file, Response, jsonify
 from datetime import datetime, date
 from dbconnection import DBConnection
+from periods import period_bounds, period_filter
+from rollup import category_totals, forget_employee, track_claim
+from passwords import HasherBusy, PasswordHasher
+from ratelimit import TokenBuckets
+from snapshots import EmployeeSnapshots
+from pagination import page_request, keyset_clause, split_page
+from claimdetails import CLAIM_IMAGES, admin_claim_detail, claim_images, employee_claim_detail
+from imagehashing import HashingTimeout, ImageHashPool
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import math
+import time
+from functools import partial
 import logging
 from decimal import Decimal
 from fpdf import FPDF
@@ -18,7 +30,6 @@ except ImportError as e:
     pd = None
 from io import BytesIO
 from dotenv import load_dotenv
-from passlib.hash import bcrypt
 
 
 # Configure logging for production
@@ -36,23 +47,158 @@ app.config['SESSION_COOKIE_SECURE'] = os.getenv("FLASK_ENV") == "production"  #
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
+# number of reverse proxies in front of the app whose X-Forwarded-For is trusted.
+# The default of 1 matches the Railway edge proxy; without it every request would
+# carry the proxy's address and all clients would share one sign-in throttle bucket.
+# Set 0 only when clients connect to gunicorn directly (otherwise they could spoof it)
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT, x_proto=TRUSTED_PROXY_COUNT)
+
 
 # initialize the database connection
+# DB_BACKEND=sqlite runs against an embedded database file for local profiling
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+
 db = DBConnection(
     host=os.getenv("DB_HOST", "107.173.146.16"),
     user=os.getenv("DB_USER", "acorn_user"),
     password=os.getenv("DB_PASSWORD", "Acorn_hr2025"),
-    database=os.getenv("DB_NAME", "acorn_hr"),
-    port=int(os.getenv("DB_PORT", "3306"))
+    database=os.getenv("DB_SQLITE_PATH", "acorn_hr.db") if DB_BACKEND == "sqlite" else os.getenv("DB_NAME", "acorn_hr"),
+    port=int(os.getenv("DB_PORT", "3306")),
+    backend=DB_BACKEND,
+    pool_min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+    pool_max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    ping_interval=float(os.getenv("DB_PING_INTERVAL", "30")),
+    statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "0")),
+    slow_query_ms=float(os.getenv("DB_SLOW_QUERY_MS", "500")),
+    repeat_threshold=int(os.getenv("DB_REPEAT_QUERY_THRESHOLD", "5")),
+    fanout_workers=int(os.getenv("DB_FANOUT_WORKERS", "4")),
+    result_cache_size=int(os.getenv("DB_RESULT_CACHE_SIZE", "512")),
+    result_cache_ttl=float(os.getenv("DB_RESULT_CACHE_TTL", "30")),
+    replica_url=os.getenv("DB_REPLICA_URL"),
+    max_replica_lag=float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
 )
 
+# seconds a session keeps reading from the primary after it wrote something
+REPLICA_PIN_SECONDS = float(os.getenv("DB_REPLICA_PIN_SECONDS", "10"))
+
+# bcrypt runs on a small process pool; past workers + queue callers get a 503.
+# BCRYPT_ROUNDS is the cost policy: new hashes use it and weaker ones are upgraded at sign-in
+passwords = PasswordHasher(
+    rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", "8")),
+    timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+)
+
+# password attempts are throttled per client address and per account
+ip_attempts = TokenBuckets(
+    rate=float(os.getenv("LOGIN_IP_PER_MINUTE", "10")) / 60,
+    burst=int(os.getenv("LOGIN_IP_BURST", "20"))
+)
+account_attempts = TokenBuckets(
+    rate=float(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", "2")) / 60,
+    burst=int(os.getenv("LOGIN_ACCOUNT_BURST", "5"))
+)
+
+
+# invoice images of a claim are decoded and hashed side by side on a shared thread pool;
+# a submission waits at most IMAGE_HASH_BUDGET seconds for all of them
+image_hashes = ImageHashPool(
+    max_workers=int(os.getenv("IMAGE_HASH_WORKERS", "4")),
+    max_queue=int(os.getenv("IMAGE_HASH_QUEUE", "16")),
+    budget=float(os.getenv("IMAGE_HASH_BUDGET", "10"))
+)
+
+
+# employee credit and claims for emp_dashboard and emp_form, cached briefly per employee
+snapshots = EmployeeSnapshots(db, ttl=float(os.getenv("EMPLOYEE_SNAPSHOT_TTL", "15")))
+
+
+# claim lists are paged newest first by ClaimID; ?size= may ask for up to CLAIMS_MAX_PAGE_SIZE
+CLAIMS_PAGE_SIZE = int(os.getenv("CLAIMS_PAGE_SIZE", "25"))
+CLAIMS_MAX_PAGE_SIZE = int(os.getenv("CLAIMS_MAX_PAGE_SIZE", "100"))
+
+
+def claims_page():
+    return page_request(request.args, CLAIMS_PAGE_SIZE, CLAIMS_MAX_PAGE_SIZE)
+
+
+def snapshot_version():
+    return session.get('snapshot_version', 0)
+
+
+def employee_changed(emp_id):
+    """
+    Drop an employee's cached snapshot after a write to their credit or claims. When
+    the employee made the change themselves, bumping the version in their session
+    also skips copies cached by other worker processes.
+    """
+    snapshots.invalidate(emp_id)
+    if str(session.get('emp_id')) == str(emp_id):
+        session['snapshot_version'] = snapshot_version() + 1
+
+
+def throttle_password_attempt(account):
+    """Seconds this client or account must wait before another password check; 0 if allowed."""
+    return max(ip_attempts.take(request.remote_addr or 'unknown'), account_attempts.take(account))
+
+
+def too_many_attempts(wait):
+    retry_after = math.ceil(wait)
+    response = jsonify({'success': False, 'error': f"Too many attempts. Please try again in {retry_after} seconds."})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
+def store_rehashed_password(role, user_id, old_hash, new_hash):
+    """Save a re-costed hash unless the password changed in the meantime. Runs off the request thread."""
+    table, key = ('admin', 'AdminID') if role == 'admin' else ('employee', 'EmpID')
+    try:
+        db.execute_query(f"UPDATE {table} SET Password = %s WHERE {key} = %s AND Password = %s",
+                         (new_hash, user_id, old_hash))
+    except Exception as e:
+        logging.warning("Password rehash for %s %s failed: %s", role, user_id, e)
+    finally:
+        db.release()
+
+
+@app.errorhandler(HasherBusy)
+def password_hasher_busy(e):
+    response = jsonify({'success': False, 'error': "The server is busy. Please try again in a moment."})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+# connections are opened lazily by the first query in each process, so importing
+# the app (e.g. gunicorn --preload) opens no socket a forked worker could inherit;
+# gunicorn.conf.py warms the pool up in the background once a worker has booted
+
+
+@app.before_request
+def start_query_tracking():
+    # sessions that wrote recently read their own writes from the primary
+    db.begin_request(request.endpoint, pin_primary=session.get('db_pinned_until', 0) > time.time())
 
-try:
-    db.connect()
-    
-except Exception as e:
-    print(f"\n\033[0;31mDatabase connection failed: {e}\033[0m")
-    print("Please check your database configuration and environment variables.")
+
+@app.after_request
+def report_query_tracking(response):
+    # per-request DB summary as a log line and a Server-Timing header
+    summary = db.end_request()
+    if summary and summary['writes'] and db.replica is not None:
+        session['db_pinned_until'] = time.time() + REPLICA_PIN_SECONDS
+    if summary and summary['queries']:
+        response.headers['Server-Timing'] = f'db;dur={summary["db_time_ms"]};desc="{summary["queries"]} queries"'
+        logging.info("%s: %d queries, %.2f ms DB time, %d rows",
+                     summary['endpoint'], summary['queries'], summary['db_time_ms'], summary['rows'])
+    return response
+
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    # return this request's pooled connection
+    db.release()
 
 
 # configure uploads folder path for Railway volume
@@ -79,7 +225,18 @@ def allowed_file(filename):
 @app.route('/health')
 def health_check():
     """Health check endpoint for Railway"""
-    return jsonify({"status": "healthy", "message": "AcornHR is running"}), 200
+    return jsonify({"status": "healthy", "message": "AcornHR is running", "db_pool": db.pool_stats(),
+                    "db_statements": db.statement_cache_stats(), "password_hasher": passwords.stats(),
+                    "image_hasher": image_hashes.stats()}), 200
+
+@app.route('/db_stats')
+def db_stats():
+    """Per-endpoint query statistics for admins"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    return jsonify({"pool": db.pool_stats(), "statements": db.statement_cache_stats(), "queries": db.query_stats(),
+                    "replica": db.replica_stats(), "result_cache": db.result_cache_stats(),
+                    "employee_snapshots": snapshots.stats()}), 200
 
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
@@ -100,38 +257,41 @@ def signin():
     email = request.form['email']
     password = request.form['password']
 
-    
+    account = email.strip().lower()
+    wait = throttle_password_attempt(account)
+    if wait:
+        return too_many_attempts(wait)
 
-    # admin-access
-    query = "SELECT * FROM admin WHERE Email = %s"
-    admin_check = db.fetch_data(query, (email,))
-    if admin_check:
-        stored_hash = admin_check[0][2]  # assuming Password is 3rd column
-        
-        
-        if bcrypt.verify(password, stored_hash):
-            session['admin_id'] = admin_check[0][0]
-            session['admin_name'] = admin_check[0][3] + " " + admin_check[0][4]
-            
-            return jsonify({'success': True, 'redirect': url_for('dashboard')})
-        else:
-            return jsonify({'success': False, 'error': "Password is incorrect. Try again."})
+    # one indexed lookup across both roles; an admin account wins over an employee one
+    query = """
+        SELECT 'admin' AS Role, AdminID AS UserID, Password, FirstName, LastName FROM admin WHERE Email = %s
+        UNION ALL
+        SELECT 'employee' AS Role, EmpID AS UserID, Password, FirstName, LastName FROM employee WHERE Email = %s
+        ORDER BY Role
+        LIMIT 1
+    """
+    account_check = db.fetch_data(query, (email, email), named=True)
+    if account_check:
+        user = account_check[0]
+        stored_hash = user.Password
 
-    # employee-access
-    query = "SELECT * FROM employee WHERE Email = %s"
-    user_check = db.fetch_data(query, (email,))
-    if user_check:
-        stored_hash = user_check[0][2]  # assuming Password is 3rd column
-        
-        
-        if bcrypt.verify(password, stored_hash):
-            session['emp_id'] = user_check[0][0]
-            session['emp_name'] = user_check[0][3] + " " + user_check[0][4]
-            
-            return jsonify({'success': True, 'redirect': url_for('emp_dashboard')})
-        else:
+        if not passwords.verify(password, stored_hash):
             return jsonify({'success': False, 'error': "Password is incorrect. Try again."})
 
+        account_attempts.reset(account)
+        if passwords.needs_rehash(stored_hash):
+            # upgrade the hash to the current cost off the request path
+            passwords.rehash_later(password, partial(store_rehashed_password, user.Role, user.UserID, stored_hash))
+
+        if user.Role == 'admin':
+            session['admin_id'] = user.UserID
+            session['admin_name'] = user.FirstName + " " + user.LastName
+            return jsonify({'success': True, 'redirect': url_for('dashboard')})
+
+        session['emp_id'] = user.UserID
+        session['emp_name'] = user.FirstName + " " + user.LastName
+        return jsonify({'success': True, 'redirect': url_for('emp_dashboard')})
+
     return jsonify({'success': False, 'error': "Your account is not registered. Please contact Acorn HR for assistance."})
 
 
@@ -158,6 +318,10 @@ def change_password():
     new_password = data.get('newPassword')
     emp_id = session['emp_id']
 
+    wait = throttle_password_attempt(f"employee:{emp_id}")
+    if wait:
+        return too_many_attempts(wait)
+
     # Fetch hashed password from DB
     query = "SELECT Password FROM employee WHERE EmpID = %s"
     result = db.fetch_data(query, (emp_id,))
@@ -165,11 +329,11 @@ def change_password():
     
     
     
-    if not result or not bcrypt.verify(current_password, stored_hash):
+    if not result or not passwords.verify(current_password, stored_hash):
         return jsonify({'error': 'Current password is incorrect. Try again.'})
 
     # Hash the new password and update
-    new_hashed = bcrypt.hash(new_password)
+    new_hashed = passwords.hash(new_password)
     query = "UPDATE employee SET Password = %s WHERE EmpID = %s"
     db.execute_query(query, (new_hashed, emp_id))
     
@@ -189,16 +353,20 @@ def change_admin_password():
     new_password = data.get('newPassword')
     admin_id = session['admin_id']
 
+    wait = throttle_password_attempt(f"admin:{admin_id}")
+    if wait:
+        return too_many_attempts(wait)
+
     # Fetch hashed password from DB
     query = "SELECT Password FROM admin WHERE AdminID = %s"
     result = db.fetch_data(query, (admin_id,))
     stored_hash = result[0][0]
 
-    if not result or not bcrypt.verify(current_password, stored_hash):
+    if not result or not passwords.verify(current_password, stored_hash):
         return jsonify({'error': 'Current password is incorrect. Try again.'})
 
     # Hash the new password and update
-    new_hashed = bcrypt.hash(new_password)
+    new_hashed = passwords.hash(new_password)
     query = "UPDATE admin SET Password = %s WHERE AdminID = %s"
     db.execute_query(query, (new_hashed, admin_id))
 
@@ -218,102 +386,20 @@ def emp_dashboard():
     except Exception as e:
         return jsonify({'error': 'An error occurred while fetching employee details'}), 500
 
-    # fetch credit limits
-    fuel_credit_query = "SELECT FuelCreditLimit FROM credit WHERE EmpID = %s"
-    fuel_credit_limit = db.fetch_data(fuel_credit_query, (emp_id,))
-    opd_credit_query = "SELECT OPDCreditLimit FROM credit WHERE EmpID = %s"
-    opd_credit_limit = db.fetch_data(opd_credit_query, (emp_id,))
-    fuel_credit_limit = fuel_credit_limit[0][0] if fuel_credit_limit else 0
-    opd_credit_limit = opd_credit_limit[0][0] if opd_credit_limit else 0
-
-    # fetch credit balance
-    fuel_credit_query = "SELECT FuelCreditBalance FROM credit WHERE EmpID = %s"
-    fuel_credit_balance = db.fetch_data(fuel_credit_query, (emp_id,))
-    opd_credit_query = "SELECT OPDCreditBalance FROM credit WHERE EmpID = %s"
-    opd_credit_balance = db.fetch_data(opd_credit_query, (emp_id,))
-    fuel_credit_balance = fuel_credit_balance[0][0] if fuel_credit_balance else 0
-    opd_credit_balance = opd_credit_balance[0][0] if opd_credit_balance else 0
-
-    # fetch recent claims
-    query = "SELECT ClaimID, DateOfRequest, Category, Amount, Status FROM claim WHERE EmpID = %s ORDER BY ClaimID DESC"
-    claims = db.fetch_data(query, (emp_id,))
-
-    recent_requests_query = """
-        SELECT 
-            claim.ClaimID, 
-            employee.FirstName, 
-            employee.LastName,
-            claim.DateOfRequest, 
-            claim.Amount, 
-            claim.Category, 
-            claim.EmpMessage,
-            claimimage.Image,
-            claim.Status, 
-            admin.FirstName AS AdminFirstName,
-            admin.LastName AS AdminLastName,
-            admin.Email AS AdminEmail,
-            admin.TpNo AS AdminTpNo, 
-            claimapproval.DateOfApproval,
-            claimapproval.AdminMessage
-        FROM 
-            claim
-        JOIN 
-            employee ON claim.EmpID = employee.EmpID
-        JOIN 
-            claimimage ON claim.ClaimID = claimimage.ClaimID
-        LEFT JOIN 
-            claimapproval ON claim.ClaimID = claimapproval.ClaimID
-        JOIN
-            admin ON claimapproval.AdminID = admin.AdminID
-        WHERE 
-            employee.EmpID = %s
-        ORDER BY 
-            claim.ClaimID DESC;
-
-        """
-    claim_details = db.fetch_data(recent_requests_query, (emp_id,))
-
-    # store claim details in a dictionary
-    claim_details_dict = {}
-    for claim_id, first_name, last_name, date_of_request, amount, category, emp_message, image_url, status, admin_fname, admin_lname, admin_email, admin_tp, approval_date, admin_message in claim_details :
-        if claim_id not in claim_details_dict:
-            date_of_request = date_of_request.strftime('%d-%m-%Y') if date_of_request else None
-            approval_date = approval_date.strftime('%d-%m-%Y') if approval_date else None  
-            claim_details_dict[claim_id] = {
-                'ClaimID': claim_id,
-                'DateOfRequest': date_of_request,
-                'Amount': amount,
-                'Category': category,
-                'Status': status,
-                'EmpMessage': emp_message,
-                'Employee': {
-                    'FirstName': first_name,
-                    'LastName': last_name,
-                },
-                'Images': [],
-                'Admin': {
-                    'FirstName': admin_fname,
-                    'LastName': admin_lname,
-                    'Email': admin_email,
-                    'TpNo': admin_tp
-                },
-                'Approval': {
-                    'DateOfApproval': approval_date,
-                    'AdminMessage': admin_message
-                }
-            }
-        if image_url:
-            claim_details_dict[claim_id]['Images'].append(image_url)
+    # limits, balances and one page of claim summaries, in two queries at most
+    page = claims_page()
+    snapshot = snapshots.get(emp_id, snapshot_version(), page)
 
     return render_template(
         'emp_dashboard.html',
         emp_name=emp_name,
-        fuel_credit_limit=fuel_credit_limit,
-        opd_credit_limit=opd_credit_limit,
-        fuel_credit_balance=fuel_credit_balance,
-        opd_credit_balance=opd_credit_balance,
-        claims=claims,
-        claim_details_dict=claim_details_dict 
+        fuel_credit_limit=snapshot.credit.fuel_credit_limit,
+        opd_credit_limit=snapshot.credit.opd_credit_limit,
+        fuel_credit_balance=snapshot.credit.fuel_credit_balance,
+        opd_credit_balance=snapshot.credit.opd_credit_balance,
+        claims=snapshot.claims,
+        page=page,
+        older_cursor=snapshot.older_cursor
     )
 
 @app.route('/delete_claim/<int:claim_id>', methods=['DELETE'])
@@ -325,35 +411,37 @@ def delete_claim(claim_id):
         
         # fetch claim details
         query = "SELECT Category, Amount FROM claim WHERE ClaimID = %s"
-        claim_data = db.fetch_data(query, (claim_id,))
-        category = claim_data[0][0]
-        amount = claim_data[0][1]
+        claim_data = db.fetch_data(query, (claim_id,), named=True)
+        category = claim_data[0].Category
+        amount = claim_data[0].Amount
             
     except Exception as e:
         return jsonify({'error': 'Internal Server Error'}), 500
 
     try:
-        # delete associated claim images
-        delete_images_query = "DELETE FROM claimimage WHERE ClaimID = %s"
-        db.execute_query(delete_images_query, (claim_id,))
+        with db.transaction(), track_claim(db, claim_id):
+            # delete associated claim images
+            delete_images_query = "DELETE FROM claimimage WHERE ClaimID = %s"
+            db.execute_query(delete_images_query, (claim_id,))
 
-        if category == 'Fuel':
-            update_balance_query = """
-                UPDATE credit
-                SET FuelCreditBalance = FuelCreditBalance + %s
-                WHERE EmpID = %s
-            """
-        elif category == 'OPD':
-            update_balance_query = """
-                UPDATE credit
-                SET OPDCreditBalance = OPDCreditBalance + %s
-                WHERE EmpID = %s
-            """
-        db.execute_query(update_balance_query, (amount, emp_id))
+            if category == 'Fuel':
+                update_balance_query = """
+                    UPDATE credit
+                    SET FuelCreditBalance = FuelCreditBalance + %s
+                    WHERE EmpID = %s
+                """
+            elif category == 'OPD':
+                update_balance_query = """
+                    UPDATE credit
+                    SET OPDCreditBalance = OPDCreditBalance + %s
+                    WHERE EmpID = %s
+                """
+            db.execute_query(update_balance_query, (amount, emp_id))
 
-        # delete the claim record
-        delete_claim_query = "DELETE FROM claim WHERE ClaimID = %s"
-        db.execute_query(delete_claim_query, (claim_id,))
+            # delete the claim record
+            delete_claim_query = "DELETE FROM claim WHERE ClaimID = %s"
+            db.execute_query(delete_claim_query, (claim_id,))
+        employee_changed(emp_id)
 
         return jsonify({'success': True}), 200
 
@@ -368,44 +456,47 @@ def get_claim_details(claim_id):
         return jsonify({'error': 'An error occurred while fetching employee details'}), 500
     
     try:
-        query = """
+        # one row per claim, its images aggregated in the database
+        query = f"""
         SELECT 
-            claim.Amount, 
-            claim.Category, 
-            claim.EmpMessage,
-            claimimage.Image
+            c.Amount, 
+            c.Category, 
+            c.EmpMessage,
+            {CLAIM_IMAGES}
         FROM 
-            claim
-        JOIN 
-            claimimage ON claim.ClaimID = claimimage.ClaimID
+            claim c
         WHERE 
-            claim.ClaimID = %s;
+            c.ClaimID = %s;
         """
         
-        claim_data = db.fetch_data(query, (claim_id,))
+        claim_data = db.fetch_data(query, (claim_id,), named=True)
         
         if not claim_data:
             return jsonify({'error': 'Claim not found'}), 404
 
-        # Initialize an empty dictionary for the response
         claim_details = {
-            'amount': claim_data[0][0],  # Claim Amount
-            'category': claim_data[0][1],  # Claim Category
-            'empMessage': claim_data[0][2],  # Employee Message
-            'images': []  # List to store image URLs
+            'amount': claim_data[0].Amount,
+            'category': claim_data[0].Category,
+            'empMessage': claim_data[0].EmpMessage,
+            'images': claim_images(claim_data[0].Images)
         }
 
-        # Loop through claim_data to extract all image URLs
-        for row in claim_data:
-            image_url = row[3]  # ClaimImage.Image is at index 3
-            if image_url:  # If the image URL exists
-                claim_details['images'].append(image_url)  # Add the image URL to the list
-
         return jsonify(claim_details)
     
     except Exception as e:
         return jsonify({'error': 'Internal Server Error'}), 500
 
+@app.route('/emp_claim_details/<int:claim_id>', methods=['GET'])
+def emp_claim_details(claim_id):
+    if 'emp_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    # one of the employee's own decided claims, for the "More Details" modal
+    claim = employee_claim_detail(db, claim_id, session['emp_id'])
+    if claim is None:
+        return jsonify({'error': 'Claim not found'}), 404
+    return jsonify(claim)
+
 @app.route('/update_claim/<int:claim_id>', methods=['POST'])
 def update_claim(claim_id):
     try:
@@ -449,7 +540,7 @@ def update_claim(claim_id):
                 SET FuelCreditBalance = %s
                 WHERE EmpID = %s
             """
-            db.execute_query(update_balance_query, (fuel_credit_balance, emp_id))
+            new_balance = fuel_credit_balance
 
         elif category == 'OPD':
             if opd_credit_balance < amount:
@@ -462,25 +553,22 @@ def update_claim(claim_id):
                 SET OPDCreditBalance = %s
                 WHERE EmpID = %s
             """
-            db.execute_query(update_balance_query, (opd_credit_balance, emp_id))
+            new_balance = opd_credit_balance
 
         else:
             return jsonify({'error': 'Invalid claim category'}), 400
-    
-        update_query = """
-            UPDATE claim 
-            SET DateOfRequest = %s
-            WHERE ClaimID = %s;
-        """
-        db.execute_query(update_query, (datetime.now(), claim_id))
 
-        # SQL query to update the claim details
-        update_query = """
-            UPDATE claim
-            SET Amount = %s, EmpMessage = %s
-            WHERE ClaimID = %s
-        """
-        db.execute_query(update_query, (amount, emp_message, claim_id))
+        with db.transaction(), track_claim(db, claim_id):
+            db.execute_query(update_balance_query, (new_balance, emp_id))
+
+            # SQL query to update the claim details
+            update_query = """
+                UPDATE claim
+                SET DateOfRequest = %s, Amount = %s, EmpMessage = %s
+                WHERE ClaimID = %s
+            """
+            db.execute_query(update_query, (datetime.now(), amount, emp_message, claim_id))
+        employee_changed(emp_id)
 
         return jsonify({'success': 'Claim updated successfully'}), 200
 
@@ -502,11 +590,8 @@ def emp_form():
     except Exception as e:
         return jsonify({'error': 'An error occurred while fetching employee details'}), 500
 
-    # fetch credit balance
-    fuel_credit_balance = db.fetch_data("SELECT FuelCreditBalance FROM credit WHERE EmpID = %s", (emp_id,))
-    fuel_credit_balance = fuel_credit_balance[0][0] if fuel_credit_balance else 0
-    opd_credit_balance = db.fetch_data("SELECT OPDCreditBalance FROM credit WHERE EmpID = %s", (emp_id,))
-    opd_credit_balance = opd_credit_balance[0][0] if opd_credit_balance else 0
+    # fetch credit balance; a submission checks against a fresh read, not the cached one
+    credit = snapshots.credit(emp_id, snapshot_version(), fresh=request.method == 'POST')
 
     if request.method == 'POST':
         status = 'Pending'
@@ -521,108 +606,128 @@ def emp_form():
             amount = Decimal(0)
         
         # credit balance check
-        category_field = "FuelCreditBalance" if category == 'Fuel' else "OPDCreditBalance"
-        balance_query = f"SELECT {category_field} FROM credit WHERE EmpID = %s"
-        balance = db.fetch_data(balance_query, (emp_id,))
-        balance = balance[0][0] if balance else Decimal(0)
+        balance = credit.fuel_credit_balance if category == 'Fuel' else credit.opd_credit_balance
 
         if balance < amount:
             return jsonify({"error": f"Insufficient {category} credit balance. Your current balance is {balance} LKR."}), 400
         
-        hash_list = []
-
         # process uploaded images
         if images:
             for image in images:
-                if allowed_file(image.filename):
-
-                    # pointer at the start
-                    image.stream.seek(0)  
-                    pil_image = Image.open(image)
-
-                    try:
-                        hash_val = get_fast_image_hash(pil_image)
-                        hash_list.append(str(hash_val))
-                    except Exception as e:
-                        return jsonify({"error": "Internal Server Error"}), 500
-
-                    # check if image hash exists in DB
-                    query = "SELECT ClaimID FROM claimimage WHERE ImageHash = %s"
-                    ex_claim_id = db.fetch_data(query, (hash_list[-1],))
-                    ex_claim_id = ex_claim_id[0][0] if ex_claim_id else None
-
-                    if ex_claim_id is not None:
-                        query = """
-                            SELECT DateOfRequest, Status FROM claim
-                            WHERE ClaimID = %s AND Status IN ('Approved', 'Pending')
-                        """
-                        ex_record = db.fetch_data(query, (ex_claim_id,))
-                        if ex_record and ex_record[0][1] == 'Approved':
-                            date_of_request = ex_record[0][0].strftime("%d %B %Y")
-                            return jsonify({"error": f"This invoice is already approved on {date_of_request}. Please contact HR if you did not submit this invoice."}), 400
-                        elif ex_record and ex_record[0][1] == 'Pending':
-                            return jsonify({"error": "This invoice is already marked as Pending. Please contact HR if you did not submit this invoice."}), 400
-
-                else:
+                if not allowed_file(image.filename):
                     return jsonify({"error": "Invalid file format. Please upload only PNG, JPG, or JPEG images."}), 400
+
+            # decode and hash every image concurrently, then check them all against the DB
+            try:
+                hash_list = [str(hash_val) for hash_val in image_hashes.hash_all(hash_upload, images)]
+            except HashingTimeout:
+                return jsonify({"error": "Your images are taking too long to process. Please try again in a moment."}), 503
+            except Exception as e:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            # one query for every hash of the submission; report all conflicting images at once
+            duplicates = find_duplicate_invoices(hash_list)
+            if duplicates:
+                return jsonify({"error": duplicate_invoice_message(images, duplicates),
+                                "duplicates": [{"image": images[i].filename, "status": status,
+                                                "date_of_request": date_of_request.strftime("%d %B %Y")}
+                                               for i, (status, date_of_request) in sorted(duplicates.items())]}), 400
         else:
             return jsonify({"error": "No images uploaded. Please upload at least one image of the invoice."}), 400
             
-        # Insert claim into the database
-        query = """
-            INSERT INTO claim (EmpID, Category, Amount, Status, EmpMessage, DateOfRequest)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        db.execute_query(query, (emp_id, category, amount, status, message, datetime.now().date()))
-
-        # Retrieve ClaimID of the newly inserted claim
-        max_claim_id = db.fetch_data("SELECT MAX(ClaimID) FROM claim")
-        next_claim_id = max_claim_id[0][0] if max_claim_id and max_claim_id[0][0] is not None else 1
-
-        # Save uploaded images
-        for i, image in enumerate(images):
-            if image and allowed_file(image.filename):
-                image.stream.seek(0)  # Reset stream pointer before saving
-
-                # Fetch next ImageID
-                max_img_id = db.fetch_data("SELECT MAX(ImageID) FROM claimimage")
-                next_img_id = max_img_id[0][0] + 1 if max_img_id and max_img_id[0][0] is not None else 1
-
-                # Save file
-                file_extension = os.path.splitext(image.filename)[1].lower()
-                filename = f"{next_img_id}{file_extension}"
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        with db.transaction():
+            # Insert claim into the database
+            query = """
+                INSERT INTO claim (EmpID, Category, Amount, Status, EmpMessage, DateOfRequest)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """
+            # the generated ClaimID of the newly inserted claim
+            next_claim_id = db.execute_query(query, (emp_id, category, amount, status, message, datetime.now().date()))
+
+            # Save uploaded images
+            image_rows = []
+            for i, image in enumerate(images):
+                if image and allowed_file(image.filename):
+                    image.stream.seek(0)  # Reset stream pointer before saving
+
+                    # Save file, named after the claim so no ImageID lookup is needed
+                    file_extension = os.path.splitext(image.filename)[1].lower()
+                    filename = f"{next_claim_id}_{i + 1}{file_extension}"
+                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                 
-                with open(filepath, "wb") as f:
-                    f.write(image.read())
+                    with open(filepath, "wb") as f:
+                        f.write(image.read())
 
-                # Store the image path in the database (only hash and image path, no OCR data)
-                query = "INSERT INTO claimimage (ClaimID, Image, ImageHash) VALUES (%s, %s, %s)"
-                db.execute_query(query, (next_claim_id, filename, hash_list[i]))
+                    image_rows.append((next_claim_id, filename, hash_list[i]))
 
-        if category == 'Fuel':
-            update_balance_query = """
-                UPDATE credit
-                SET FuelCreditBalance = FuelCreditBalance - %s
-                WHERE EmpID = %s
-            """
-        elif category == 'OPD':
-            update_balance_query = """
-                UPDATE credit
-                SET OPDCreditBalance = OPDCreditBalance - %s
-                WHERE EmpID = %s
-            """
-        db.execute_query(update_balance_query, (form_amount, emp_id))
+            # Store the image paths in the database in one multi-row insert (only hash and image path, no OCR data)
+            query = "INSERT INTO claimimage (ClaimID, Image, ImageHash) VALUES (%s, %s, %s)"
+            db.execute_many(query, image_rows)
+
+            if category == 'Fuel':
+                update_balance_query = """
+                    UPDATE credit
+                    SET FuelCreditBalance = FuelCreditBalance - %s
+                    WHERE EmpID = %s
+                """
+            elif category == 'OPD':
+                update_balance_query = """
+                    UPDATE credit
+                    SET OPDCreditBalance = OPDCreditBalance - %s
+                    WHERE EmpID = %s
+                """
+            db.execute_query(update_balance_query, (form_amount, emp_id))
+        employee_changed(emp_id)
         
         return jsonify({"success": "Your request has been marked as pending. Thank you."}), 200
 
     return render_template(
         'emp_form.html',
         emp_name=emp_name,
-        fuel_credit_balance=fuel_credit_balance,
-        opd_credit_balance=opd_credit_balance
+        fuel_credit_balance=credit.fuel_credit_balance,
+        opd_credit_balance=credit.opd_credit_balance
     )
 
+def find_duplicate_invoices(hash_list):
+    """
+    {index in hash_list: (status, date of request)} for every hash already on an
+    Approved or Pending claim, in one indexed join; an Approved match wins over a Pending one.
+    """
+    if not hash_list:
+        return {}
+    placeholders = ", ".join(["%s"] * len(set(hash_list)))
+    query = f"""
+        SELECT ci.ImageHash, c.Status, c.DateOfRequest
+        FROM claimimage ci
+        JOIN claim c ON c.ClaimID = ci.ClaimID
+        WHERE ci.ImageHash IN ({placeholders}) AND c.Status IN ('Approved', 'Pending')
+    """
+    matches = {}
+    for image_hash, status, date_of_request in db.fetch_data(query, sorted(set(hash_list))):
+        found = matches.get(image_hash)
+        if found is None or (status == 'Approved' and found[0] != 'Approved'):
+            matches[image_hash] = (status, date_of_request)
+    return {i: matches[image_hash] for i, image_hash in enumerate(hash_list) if image_hash in matches}
+
+def duplicate_invoice_message(images, duplicates):
+    if len(duplicates) == 1:
+        status, date_of_request = next(iter(duplicates.values()))
+        if status == 'Approved':
+            return f"This invoice is already approved on {date_of_request.strftime('%d %B %Y')}. Please contact HR if you did not submit this invoice."
+        return "This invoice is already marked as Pending. Please contact HR if you did not submit this invoice."
+    conflicts = [
+        f"{images[i].filename} (approved on {date_of_request.strftime('%d %B %Y')})" if status == 'Approved'
+        else f"{images[i].filename} (pending)"
+        for i, (status, date_of_request) in sorted(duplicates.items())
+    ]
+    return f"These invoices were already submitted: {', '.join(conflicts)}. Please contact HR if you did not submit them."
+
+def hash_upload(image):
+    """Perceptual hash of one uploaded file; runs on the image hash pool."""
+    # pointer at the start
+    image.stream.seek(0)
+    return get_fast_image_hash(Image.open(image))
+
 def get_fast_image_hash(image):
     """Fast perceptual hash for duplicate detection"""
     try:
@@ -636,6 +741,99 @@ def get_fast_image_hash(image):
 
 """ Admin Dashboard Function"""
 
+def employee_claims_pdf(employee_claims, selected_month, selected_year):
+    """The dashboard's per-employee claims as a PDF; employee_claims may be a stream of rows."""
+    with NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)  # Ensuring proper margins
+        pdf.add_page()
+
+        # Add logo
+        logo_path = "static/img/Acorn.png"
+        pdf.image(logo_path, x=10, y=8, w=30)  # Adjust size and position
+
+        # Title with better positioning
+        pdf.set_font("Arial", 'B', 20)
+        pdf.cell(200, 15, txt="Claims Report", ln=True, align='C')
+        pdf.ln(5)
+
+        # Subheading with month and year
+        pdf.set_font("Arial", 'I', 12)
+        pdf.cell(200, 10, txt=f"Month: {selected_month}  |  Year: {selected_year}", ln=True, align='C')
+        pdf.ln(10)
+
+        # Adding a horizontal line for professionalism
+        pdf.set_draw_color(0, 0, 0)  # Black color
+        pdf.set_line_width(0.5)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())  # Draws a line across the page
+        pdf.ln(5)
+
+        # Table headers with a background color
+        pdf.set_fill_color(200, 200, 200)  # Light gray background
+        pdf.set_font("Arial", 'B', 12)
+        headers = ["Emp ID", "Name", "Fuel (LKR)", "OPD (LKR)", "Total (LKR)"]
+        col_widths = [25, 50, 40, 40, 40]
+
+        for i, header in enumerate(headers):
+            pdf.cell(col_widths[i], 10, txt=header, border=1, align='C', fill=True)
+        pdf.ln()
+
+        # Table rows with alternating row colors
+        pdf.set_font("Arial", '', 12)
+        fill = False  # Alternate row color
+        total_fuel = total_opd = total_claims = 0  # Summary calculations
+
+        for claim in employee_claims:
+            emp_id = str(claim[0]) if claim[0] is not None else "N/A"
+            name = f"{claim[1]} {claim[2]}" if claim[1] and claim[2] else "N/A"
+            fuel = float(claim[3]) if claim[3] else 0
+            opd = float(claim[4]) if claim[4] else 0
+            total = float(claim[5]) if claim[5] else 0
+
+            total_fuel += fuel
+            total_opd += opd
+            total_claims += total
+
+            row = [emp_id, name, f"{fuel:.2f}", f"{opd:.2f}", f"{total:.2f}"]
+
+            for i in range(len(headers)):
+                pdf.cell(col_widths[i], 10, txt=row[i], border=1, align='C', fill=fill)
+            pdf.ln()
+            fill = not fill  # Toggle fill color for alternating row effect
+
+        # Add a summary section at the bottom
+        pdf.ln(5)
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(155, 10, txt="Total:", border=1, align='R', fill=True)
+        pdf.cell(40, 10, txt=f"{total_claims:.2f} LKR", border=1, align='C', fill=True)
+        pdf.ln()
+
+        # Save PDF to temporary file
+        pdf.output(temp_pdf.name)
+
+        # Return PDF for download
+        return send_file(temp_pdf.name, as_attachment=True, download_name="claims_report.pdf")
+
+
+def employee_claims_excel(employee_claims):
+    """The dashboard's per-employee claims as an Excel sheet; employee_claims may be a stream of rows."""
+    if pd is None:
+        return jsonify({'error': 'Excel export not available - pandas not installed'}), 500
+
+    output = BytesIO()
+    writer = pd.ExcelWriter(output, engine='openpyxl')
+
+    # Convert employee claims data to DataFrame
+    df = pd.DataFrame.from_records(employee_claims, columns=["Emp ID", "First Name", "Last Name", "Fuel", "OPD", "Total"])
+    df.to_excel(writer, sheet_name='Claims Report', index=False)
+
+    writer.close()
+    output.seek(0)
+
+    return send_file(output, as_attachment=True, download_name="claims_report.xlsx",
+                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
 @app.route('/dashboard', methods=['GET', 'POST'])
 def dashboard():
     admin_name = session.get('admin_name')
@@ -652,181 +850,112 @@ def dashboard():
 
     # Fetch total employees
     employee_count_query = "SELECT COUNT(*) FROM employee"
-    employee_count = db.fetch_data(employee_count_query)[0][0]
+
+    # today's approvals are day-level, so they read claim through a half-open range on
+    # DateOfApproval; the month and year figures come from the monthly roll-up
+    today_filter, today_params = period_filter('ca.DateOfApproval', start_date=today_date, end_date=today_date)
+    month_params = (selected_year, selected_month)
+    year_params = (selected_year,)
 
     # Fetch today's claims
     today_claims_query = f"""
         SELECT SUM(c.Amount) 
         FROM claim c
         JOIN claimapproval ca ON c.ClaimID = ca.ClaimID
-        WHERE c.Status = 'Approved' AND ca.DateOfApproval = '{today_date}'
+        WHERE c.Status = 'Approved' AND {today_filter}
 """
-    today_claims = db.fetch_data(today_claims_query)[0][0] or 0
 
     # Fetch monthly claims
-    monthly_claims_query = f"""
-        SELECT SUM(Amount) 
-        FROM claim 
-        WHERE Status = 'Approved' 
-          AND MONTH(DateOfRequest) = {selected_month} 
-          AND YEAR(DateOfRequest) = {selected_year}
+    monthly_claims_query = """
+        SELECT SUM(TotalAmount) 
+        FROM claimrollup 
+        WHERE ClaimYear = %s AND ClaimMonth = %s
     """
-    monthly_claims = db.fetch_data(monthly_claims_query)[0][0] or 0
 
     # Fetch claims breakdown (Fuel, OPD, Stationary)
-    claims_breakdown_query = f"""
+    claims_breakdown_query = """
         SELECT 
-            SUM(CASE WHEN Category = 'Fuel' THEN Amount ELSE 0 END) AS Fuel,
-            SUM(CASE WHEN Category = 'OPD' THEN Amount ELSE 0 END) AS OPD,
-            SUM(CASE WHEN Category = 'Stationary' THEN Amount ELSE 0 END) AS Stationary
-        FROM claim 
-        WHERE Status = 'Approved' 
-          AND MONTH(DateOfRequest) = {selected_month} 
-          AND YEAR(DateOfRequest) = {selected_year}
+            SUM(CASE WHEN Category = 'Fuel' THEN TotalAmount ELSE 0 END) AS Fuel,
+            SUM(CASE WHEN Category = 'OPD' THEN TotalAmount ELSE 0 END) AS OPD,
+            SUM(CASE WHEN Category = 'Stationary' THEN TotalAmount ELSE 0 END) AS Stationary
+        FROM claimrollup 
+        WHERE ClaimYear = %s AND ClaimMonth = %s
     """
-    claims_breakdown_result = db.fetch_data(claims_breakdown_query)
-    fuel_claims = claims_breakdown_result[0][0] if claims_breakdown_result else 0
-    opd_claims = claims_breakdown_result[0][1] if claims_breakdown_result else 0
-    stationary_claims = claims_breakdown_result[0][2] if claims_breakdown_result else 0
 
-    # Fetch monthly trend data
+    # Fetch monthly trend data for the selected year
     monthly_trend_query = """
         SELECT 
-            MONTH(DateOfRequest) AS Month, 
-            SUM(CASE WHEN Category = 'Fuel' THEN Amount ELSE 0 END) AS Fuel,
-            SUM(CASE WHEN Category = 'OPD' THEN Amount ELSE 0 END) AS OPD,
-            SUM(Amount) AS Total 
-        FROM claim 
-        WHERE Status = 'Approved' 
-        GROUP BY MONTH(DateOfRequest)
+            ClaimMonth AS Month, 
+            SUM(CASE WHEN Category = 'Fuel' THEN TotalAmount ELSE 0 END) AS Fuel,
+            SUM(CASE WHEN Category = 'OPD' THEN TotalAmount ELSE 0 END) AS OPD,
+            SUM(TotalAmount) AS Total 
+        FROM claimrollup 
+        WHERE ClaimYear = %s
+        GROUP BY ClaimMonth
     """
-    monthly_trend_data = {
-    'total': [0] * 12,
-    'fuel': [0] * 12,
-    'opd': [0] * 12
-    }
-
-    for row in db.fetch_data(monthly_trend_query):
-        month_index = row[0] - 1
-        monthly_trend_data['total'][month_index] = row[3]  # Total claims
-        monthly_trend_data['fuel'][month_index] = row[1]  # Fuel claims
-        monthly_trend_data['opd'][month_index] = row[2]   # OPD claims
 
     # Fetch employee claims for the selected month/year
-    employee_claims_query = f"""
+    employee_claims_query = """
         SELECT 
             e.EmpID, e.FirstName, e.LastName, 
-            SUM(CASE WHEN c.Category = 'Fuel' THEN c.Amount ELSE 0 END) AS Fuel,
-            SUM(CASE WHEN c.Category = 'OPD' THEN c.Amount ELSE 0 END) AS OPD,
-            SUM(c.Amount) AS Total
-        FROM employee e
-        LEFT JOIN claim c ON e.EmpID = c.EmpID
-        LEFT JOIN claimapproval ca ON c.ClaimID = ca.ClaimID
-        WHERE MONTH(c.DateOfRequest) = {selected_month} 
-          AND YEAR(c.DateOfRequest) = {selected_year}
-          AND c.Status = 'Approved'
+            SUM(CASE WHEN r.Category = 'Fuel' THEN r.TotalAmount ELSE 0 END) AS Fuel,
+            SUM(CASE WHEN r.Category = 'OPD' THEN r.TotalAmount ELSE 0 END) AS OPD,
+            SUM(r.TotalAmount) AS Total
+        FROM claimrollup r
+        JOIN employee e ON e.EmpID = r.EmpID
+        WHERE r.ClaimYear = %s AND r.ClaimMonth = %s
         GROUP BY e.EmpID, e.FirstName, e.LastName
+        HAVING SUM(r.ClaimCount) > 0
     """
-    employee_claims = db.fetch_data(employee_claims_query)
 
     # Fetch total claims for the year
-    year_claims_query = f"""
-        SELECT SUM(Amount)
-        FROM claim 
-        WHERE Status = 'Approved' 
-        AND YEAR(DateOfRequest) = {selected_year}
+    year_claims_query = """
+        SELECT SUM(TotalAmount)
+        FROM claimrollup 
+        WHERE ClaimYear = %s
     """
-    year_claims = db.fetch_data(year_claims_query)[0][0] or 0
 
-    # Handle PDF download
+    # the exports only need the per-employee rows, streamed into the file as they are read
     if 'download' in request.form:
-        with NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)  # Ensuring proper margins
-            pdf.add_page()
-
-            # Add logo
-            logo_path = "static/img/Acorn.png"
-            pdf.image(logo_path, x=10, y=8, w=30)  # Adjust size and position
-
-            # Title with better positioning
-            pdf.set_font("Arial", 'B', 20)
-            pdf.cell(200, 15, txt="Claims Report", ln=True, align='C')
-            pdf.ln(5)
-
-            # Subheading with month and year
-            pdf.set_font("Arial", 'I', 12)
-            pdf.cell(200, 10, txt=f"Month: {selected_month}  |  Year: {selected_year}", ln=True, align='C')
-            pdf.ln(10)
-
-            # Adding a horizontal line for professionalism
-            pdf.set_draw_color(0, 0, 0)  # Black color
-            pdf.set_line_width(0.5)
-            pdf.line(10, pdf.get_y(), 200, pdf.get_y())  # Draws a line across the page
-            pdf.ln(5)
-
-            # Table headers with a background color
-            pdf.set_fill_color(200, 200, 200)  # Light gray background
-            pdf.set_font("Arial", 'B', 12)
-            headers = ["Emp ID", "Name", "Fuel (LKR)", "OPD (LKR)", "Total (LKR)"]
-            col_widths = [25, 50, 40, 40, 40]
-
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], 10, txt=header, border=1, align='C', fill=True)
-            pdf.ln()
-
-            # Table rows with alternating row colors
-            pdf.set_font("Arial", '', 12)
-            fill = False  # Alternate row color
-            total_fuel = total_opd = total_claims = 0  # Summary calculations
-
-            for claim in employee_claims:
-                emp_id = str(claim[0]) if claim[0] is not None else "N/A"
-                name = f"{claim[1]} {claim[2]}" if claim[1] and claim[2] else "N/A"
-                fuel = float(claim[3]) if claim[3] else 0
-                opd = float(claim[4]) if claim[4] else 0
-                total = float(claim[5]) if claim[5] else 0
-
-                total_fuel += fuel
-                total_opd += opd
-                total_claims += total
-
-                row = [emp_id, name, f"{fuel:.2f}", f"{opd:.2f}", f"{total:.2f}"]
-
-                for i in range(len(headers)):
-                    pdf.cell(col_widths[i], 10, txt=row[i], border=1, align='C', fill=fill)
-                pdf.ln()
-                fill = not fill  # Toggle fill color for alternating row effect
-
-            # Add a summary section at the bottom
-            pdf.ln(5)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(155, 10, txt="Total:", border=1, align='R', fill=True)
-            pdf.cell(40, 10, txt=f"{total_claims:.2f} LKR", border=1, align='C', fill=True)
-            pdf.ln()
-
-            # Save PDF to temporary file
-            pdf.output(temp_pdf.name)
-
-            # Return PDF for download
-            return send_file(temp_pdf.name, as_attachment=True, download_name="claims_report.pdf")
-
+        return employee_claims_pdf(db.fetch_iter(employee_claims_query, month_params, replica=True),
+                                   selected_month, selected_year)
     if 'download_excel' in request.form:
-        if pd is None:
-            return jsonify({'error': 'Excel export not available - pandas not installed'}), 500
-        
-        output = BytesIO()
-        writer = pd.ExcelWriter(output, engine='openpyxl')
+        return employee_claims_excel(db.fetch_iter(employee_claims_query, month_params, replica=True))
+
+    # the aggregates are independent, so run them concurrently on pooled connections
+    results = db.fetch_concurrently({
+        'employee_count': employee_count_query,
+        'today_claims': (today_claims_query, today_params),
+        'monthly_claims': (monthly_claims_query, month_params),
+        'claims_breakdown': (claims_breakdown_query, month_params),
+        'monthly_trend': (monthly_trend_query, year_params),
+        'employee_claims': (employee_claims_query, month_params),
+        'year_claims': (year_claims_query, year_params),
+    }, replica=True, cache=True)
+
+    employee_count = results['employee_count'][0][0]
+    today_claims = results['today_claims'][0][0] or 0
+    monthly_claims = results['monthly_claims'][0][0] or 0
+    year_claims = results['year_claims'][0][0] or 0
+
+    claims_breakdown_result = results['claims_breakdown']
+    fuel_claims = claims_breakdown_result[0][0] if claims_breakdown_result else 0
+    opd_claims = claims_breakdown_result[0][1] if claims_breakdown_result else 0
+    stationary_claims = claims_breakdown_result[0][2] if claims_breakdown_result else 0
 
-        # Convert employee claims data to DataFrame
-        df = pd.DataFrame(employee_claims, columns=["Emp ID", "First Name", "Last Name", "Fuel", "OPD", "Total"])
-        df.to_excel(writer, sheet_name='Claims Report', index=False)
+    monthly_trend_data = {
+    'total': [0] * 12,
+    'fuel': [0] * 12,
+    'opd': [0] * 12
+    }
 
-        writer.close()
-        output.seek(0)
+    for row in results['monthly_trend']:
+        month_index = row[0] - 1
+        monthly_trend_data['total'][month_index] = row[3]  # Total claims
+        monthly_trend_data['fuel'][month_index] = row[1]  # Fuel claims
+        monthly_trend_data['opd'][month_index] = row[2]   # OPD claims
 
-        return send_file(output, as_attachment=True, download_name="claims_report.xlsx",
-                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    employee_claims = results['employee_claims']
 
     # Render the page with dynamic data
     return render_template(
@@ -851,7 +980,7 @@ def employee_count():
 
     # query to count employees
     query = "SELECT COUNT(*) FROM employee"
-    result = db.fetch_data(query)
+    result = db.fetch_data(query, cache=True)
 
     # fetch the count from the result (assuming result is a list of tuples)
     count = result[0][0] if result else 0
@@ -868,87 +997,39 @@ def claim_requests():
     except Exception as e:
         return jsonify({'error': 'An error occurred while fetching admin details'}), 500
 
-    # Fetch all claims for admin review
-    query_1 = """
+    # Fetch one page of pending claims for admin review
+    page = claims_page()
+    page_clause, page_params = keyset_clause('claim.ClaimID', page)
+    query_1 = f"""
         SELECT 
             ClaimID, EmpID, DateOfRequest, Amount, Category
         FROM 
             claim
         WHERE 
-            claim.Status = 'Pending'
-        ORDER BY 
-            claim.ClaimID DESC;
+            claim.Status = 'Pending'{page_clause};
         """
-    claims = db.fetch_data(query_1)
-
-    query_2 = """
-        SELECT 
-            claim.ClaimID, 
-            claim.EmpID,
-            employee.FirstName, 
-            employee.LastName,
-            employee.Email,
-            employee.SBU,
-            employee.TpNo,
-            claim.DateOfRequest, 
-            claim.Amount, 
-            claim.Category, 
-            claim.Status, 
-            claim.EmpMessage, 
-            claimimage.Image
-        FROM 
-            claim
-        JOIN 
-            employee ON claim.EmpID = employee.EmpID
-        LEFT JOIN 
-            claimimage ON claim.ClaimID = claimimage.ClaimID
-        WHERE 
-            claim.Status = 'Pending'
-        ORDER BY 
-            claim.ClaimID DESC;
-        """
-    
-    # fetch the claim details from the database
-    claim_details = db.fetch_data(query_2)
-
-    # initialize an empty dictionary to store claim details
-    claim_details_dict = {}
-
-    # loop through the query result and populate the dictionary
-    for claim_id, emp_id, first_name, last_name, email, sbu, tp_no, date_of_request, amount, category, status, emp_message, image_url in claim_details:
-        # check if the claim_id already exists in the dictionary
-        if claim_id not in claim_details_dict:
-            # ceate a new entry for this claim ID, adding all claim-related info
-            claim_details_dict[claim_id] = {
-                'ClaimID': claim_id,
-                'EmpID' : emp_id,
-                'DateOfRequest': date_of_request.strftime('%d-%m-%Y') if date_of_request else None,
-                'Amount': amount,
-                'Category': category,
-                'Status': status,
-                'EmpMessage': emp_message,
-                'Employee': {
-                    'FirstName': first_name,
-                    'LastName': last_name,
-                    'Email': email,
-                    'SBU': sbu,
-                    'TpNo': tp_no
-                },
-                'Images': []
-            }
-        
-        # append the image URL for this claim (if exists)
-        if image_url:
-            claim_details_dict[claim_id]['Images'].append(image_url)
+    claims, older_cursor = split_page(db.fetch_data(query_1, page_params), page)
 
     # render the claim requests page
     return render_template(
         'claim_requests.html', 
         claims=claims, 
         admin_name=admin_name, 
-        claim_details_dict=claim_details_dict
+        page=page,
+        older_cursor=older_cursor
     )
 
+@app.route('/admin_claim_details/<int:claim_id>', methods=['GET'])
+def admin_claim_details(claim_id):
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    # any claim with its employee, images and decision, for the admin modals
+    claim = admin_claim_detail(db, claim_id)
+    if claim is None:
+        return jsonify({'error': 'Claim not found'}), 404
+    return jsonify(claim)
+
 @app.route('/update_status', methods=['POST'])
 def update_status():
 
@@ -961,26 +1042,18 @@ def update_status():
     admin_message = request.form.get('admin_message', '').strip()
     date_of_approval = datetime.now().date()
 
-    # insert into ClaimApproval table
-    query = f"""
-        INSERT INTO claimapproval (ClaimID, AdminID, DateOfApproval, AdminMessage)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            DateOfApproval = %s,
-            AdminMessage = %s
-    """
-    db.execute_query(query, (claim_id, admin_id, date_of_approval, admin_message, date_of_approval, admin_message))
-
-    # fetch the claim details
+    # fetch the claim details and pick the balance update before anything is written,
+    # so an error response never leaves a partial change committed
     claim_query = "SELECT EmpID, Category, Amount FROM claim WHERE ClaimID = %s"
     claim = db.fetch_data(claim_query, (claim_id,))
 
     if not claim:
         return jsonify({'error': 'Claim not found'}), 404
-    
+
     emp_id, category, amount = claim[0]
 
-    # update the relevant credit balance if the status is Approved
+    # a rejected claim's amount goes back to the relevant credit balance
+    update_balance_query = None
     if status == 'Rejected':
         if category == 'Fuel':
             update_balance_query = """
@@ -997,14 +1070,25 @@ def update_status():
         else:
             return jsonify({'error': 'Invalid claim category'}), 400
 
-        # execute the balance update query
-        rows_affected = db.execute_query(update_balance_query, (amount, emp_id))
-        if rows_affected == 0:
-            return jsonify({'error': 'Insufficient balance or employee not found'}), 400
+    with db.transaction(), track_claim(db, claim_id):
+        # insert into ClaimApproval table
+        query = """
+            INSERT INTO claimapproval (ClaimID, AdminID, DateOfApproval, AdminMessage)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                DateOfApproval = %s,
+                AdminMessage = %s
+        """
+        db.execute_query(query, (claim_id, admin_id, date_of_approval, admin_message, date_of_approval, admin_message))
 
-    # update claim status
-    update_query = "UPDATE claim SET Status = %s WHERE ClaimID = %s"
-    db.execute_query(update_query, (status, claim_id))
+        if update_balance_query is not None:
+            # execute the balance update query
+            db.execute_query(update_balance_query, (amount, emp_id))
+
+        # update claim status
+        update_query = "UPDATE claim SET Status = %s WHERE ClaimID = %s"
+        db.execute_query(update_query, (status, claim_id))
+    employee_changed(emp_id)
 
     return jsonify({'success': 'Request status updated successfully'}), 200
 
@@ -1075,28 +1159,32 @@ def recent_requests():
                     WHERE EmpID = %s
                 """
             
-        # execute the balance update query
-        db.execute_query(update_balance_query, (amount, emp_id))
-    
-        update_query = """
-            UPDATE claim 
-            SET Status = %s
-            WHERE ClaimID = %s;
-        """
-        db.execute_query(update_query, (new_status, claim_id))
+        with db.transaction(), track_claim(db, claim_id):
+            # execute the balance update query
+            db.execute_query(update_balance_query, (amount, emp_id))
+        
+            update_query = """
+                UPDATE claim 
+                SET Status = %s
+                WHERE ClaimID = %s;
+            """
+            db.execute_query(update_query, (new_status, claim_id))
 
-        # Also update the ClaimApproval table
-        update_approval_query = """
-            UPDATE claimapproval 
-            SET AdminID = %s, DateOfApproval = NOW(), AdminMessage = %s
-            WHERE ClaimID = %s;
-        """
-        db.execute_query(update_approval_query, (admin_id, admin_message, claim_id))
+            # Also update the ClaimApproval table
+            update_approval_query = """
+                UPDATE claimapproval 
+                SET AdminID = %s, DateOfApproval = NOW(), AdminMessage = %s
+                WHERE ClaimID = %s;
+            """
+            db.execute_query(update_approval_query, (admin_id, admin_message, claim_id))
+        employee_changed(emp_id)
 
         return jsonify({'success': 'Request status updated successfully'}), 200
         
-    # fetch claims that are Approved or Rejected
-    query = """
+    # fetch one page of claims that are Approved or Rejected
+    page = claims_page()
+    page_clause, page_params = keyset_clause('c.ClaimID', page)
+    query = f"""
         SELECT 
         c.ClaimID,
         e.FirstName,
@@ -1112,95 +1200,17 @@ def recent_requests():
     LEFT JOIN claimapproval AS ca ON c.ClaimID = ca.ClaimID
     LEFT JOIN admin AS a ON ca.AdminID = a.AdminID
     JOIN employee AS e ON c.EmpID = e.EmpID
-    WHERE c.Status IN ('Approved', 'Rejected')
-    ORDER BY c.ClaimID DESC;
+    WHERE c.Status IN ('Approved', 'Rejected'){page_clause};
     """
-    claims = db.fetch_data(query)
+    claims, older_cursor = split_page(db.fetch_data(query, page_params), page)
 
-    # Fetch associated claim images
-    query_detailed = """
-        SELECT 
-            claim.ClaimID, 
-            claim.EmpID,
-            employee.FirstName, 
-            employee.LastName,
-            employee.Email,
-            employee.SBU,
-            employee.TpNo,
-            claim.DateOfRequest, 
-            claim.Amount, 
-            claim.Category, 
-            claim.EmpMessage,
-            claimimage.Image,
-            claim.Status, 
-            admin.FirstName AS AdminFirstName,
-            admin.LastName AS AdminLastName,
-            admin.Email AS AdminEmail,
-            admin.TpNo AS AdminTpNo, 
-            claimapproval.DateOfApproval,
-            claimapproval.AdminMessage
-        FROM 
-            claim
-        JOIN 
-            employee ON claim.EmpID = employee.EmpID
-        LEFT JOIN 
-            claimimage ON claim.ClaimID = claimimage.ClaimID
-        LEFT JOIN 
-            claimapproval ON claim.ClaimID = claimapproval.ClaimID
-        JOIN
-            admin ON claimapproval.AdminID = admin.AdminID
-        WHERE 
-            claim.Status IN ('Approved', 'Rejected')
-        ORDER BY 
-            claim.ClaimID DESC;
-
-        """
-    claim_details = db.fetch_data(query_detailed)
-
-    # Initialize an empty dictionary to store claim details
-    claim_details_dict = {}
-
-    # Loop through the claim details and populate the dictionary
-    for claim_id, emp_id, first_name, last_name, email, sbu, tp_no, date_of_request, amount, category, emp_message, image_url, status, admin_fname, admin_lname, admin_email, admin_tp, approval_date, admin_message in claim_details :
-
-        if claim_id not in claim_details_dict:
-            claim_details_dict[claim_id] = {
-                'ClaimID': claim_id,
-                'EmpID': emp_id,
-                'DateOfRequest': date_of_request.strftime('%d-%m-%Y') if date_of_request else None,
-                'Amount': amount,
-                'Category': category,
-                'Status': status,
-                'EmpMessage': emp_message,
-                'Employee': {
-                    'FirstName': first_name,
-                    'LastName': last_name,
-                    'Email': email,
-                    'SBU': sbu,
-                    'TpNo': tp_no
-                },
-                'Images': [],
-                'Admin': {
-                    'FirstName': admin_fname,
-                    'LastName': admin_lname,
-                    'Email': admin_email,
-                    'TpNo': admin_tp
-                },
-                'Approval': {
-                    'DateOfApproval': approval_date.strftime('%d-%m-%Y') if approval_date else None,
-                    'AdminMessage': admin_message
-                }
-            }
-
-        if image_url:
-            claim_details_dict[claim_id]['Images'].append(image_url)
-
-    # Render the template with the claims and claim details (images)
+    # Render the template with the claims; details are fetched when a modal opens
     return render_template(
         'recent_requests.html', 
         claims=claims, 
         admin_name=admin_name, 
-        claim_details_dict=claim_details_dict
+        page=page,
+        older_cursor=older_cursor
     )
 
 
@@ -1221,7 +1231,7 @@ def admin_form():
         # get form data
         email = request.form['email']
         password = request.form['password']
-        hashed_password = bcrypt.hash(password)
+        hashed_password = passwords.hash(password)
         
 
         first_name = request.form['first_name']
@@ -1234,22 +1244,20 @@ def admin_form():
         opd_credit_limit = request.form['opd_credit_limit']
         fuel_credit_limit = request.form['fuel_credit_limit']
 
-        # insert the new employee data into the Employee table
-        query = """
-            INSERT INTO employee (Email, Password, FirstName, LastName, NIC, DOB, Gender, SBU, TpNo)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        db.execute_query(query, (email, hashed_password, first_name, last_name, nic, dob, gender, sbu, telephone))
-
-        max_emp_query = "SELECT MAX(EmpID) FROM employee"
-        max_emp_id = db.fetch_data(max_emp_query)[0][0]
+        with db.transaction():
+            # insert the new employee data into the Employee table
+            query = """
+                INSERT INTO employee (Email, Password, FirstName, LastName, NIC, DOB, Gender, SBU, TpNo)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            emp_id = db.execute_query(query, (email, hashed_password, first_name, last_name, nic, dob, gender, sbu, telephone))
 
-        # insert the new employee data into the Credit table
-        credit_limit_query = """
-            INSERT INTO credit (EmpID, FuelCreditLimit, OPDCreditLimit, FuelCreditBalance, OPDCreditBalance)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        db.execute_query(credit_limit_query, (max_emp_id, fuel_credit_limit, opd_credit_limit, 0, 0))
+            # insert the new employee data into the Credit table
+            credit_limit_query = """
+                INSERT INTO credit (EmpID, FuelCreditLimit, OPDCreditLimit, FuelCreditBalance, OPDCreditBalance)
+                VALUES (%s, %s, %s, %s, %s)
+            """
+            db.execute_query(credit_limit_query, (emp_id, fuel_credit_limit, opd_credit_limit, 0, 0))
 
         # redirect to the admin dashboard after account creation
         return redirect(url_for('dashboard'))
@@ -1294,6 +1302,7 @@ def emp_details():
             WHERE EmpID = %s
         """
         db.execute_query(query, (fuel_limit, opd_limit, fuel_balance, opd_balance, emp_id))
+        employee_changed(emp_id)
         return redirect(url_for('emp_details'))
 
 
@@ -1335,6 +1344,7 @@ def emp_update():
                 WHERE EmpID = %s
             """
             db.execute_query(query, (first_name, last_name, email, password, nic, dob, gender, sbu, tp_no, emp_id))
+            employee_changed(emp_id)
             return redirect(url_for('emp_update'))
 
         elif action == 'delete':
@@ -1342,8 +1352,11 @@ def emp_update():
             emp_id = request.form['emp_id']
 
             # Delete the employee from the database using parameterized query
-            query = "DELETE FROM employee WHERE EmpID = %s"
-            db.execute_query(query, (emp_id,))
+            with db.transaction():
+                forget_employee(db, emp_id)
+                query = "DELETE FROM employee WHERE EmpID = %s"
+                db.execute_query(query, (emp_id,))
+            employee_changed(emp_id)
             return redirect(url_for('emp_update'))
 
 
@@ -1353,7 +1366,7 @@ def generate_report():
     
     admin_name = session.get('admin_name')
 
-    employee = db.fetch_data("SELECT EmpID, FirstName, LastName FROM employee")  # Fetch employees
+    employee = db.fetch_data("SELECT EmpID, FirstName, LastName FROM employee", replica=True, cache=True)  # Fetch employees
 
     if request.method == 'POST':
         # Get form data
@@ -1375,8 +1388,11 @@ def generate_report():
         
 
         # Construct SQL queries dynamically
-        query_conditions = "WHERE Status = 'Approved' AND DateOfRequest BETWEEN %s AND %s"
-        params = [start_date, end_date]
+        try:
+            period_start, period_end = period_bounds(start_date=start_date, end_date=end_date)
+        except ValueError as e:
+            return render_template('generate_report.html', admin_name=admin_name, employees=employee, error=str(e))
+        report_emp_id = None
 
         # Get employee details for individual reports
         employee_name = None
@@ -1385,15 +1401,14 @@ def generate_report():
             # Validate that employee_id is numeric and exists
             try:
                 employee_id = int(employee_id)
-                query_conditions += " AND EmpID = %s"
-                params.append(employee_id)
+                report_emp_id = employee_id
                 
                 # Fetch employee details
                 emp_query = "SELECT EmpID, FirstName, LastName FROM employee WHERE EmpID = %s"
-                emp_result = db.fetch_data(emp_query, [employee_id])
+                emp_result = db.fetch_data(emp_query, [employee_id], replica=True, named=True)
                 if emp_result:
-                    employee_display_id = emp_result[0][0]
-                    employee_name = f"{emp_result[0][1]} {emp_result[0][2]}"
+                    employee_display_id = emp_result[0].EmpID
+                    employee_name = f"{emp_result[0].FirstName} {emp_result[0].LastName}"
                 else:
                     # Employee ID not found, set error message or handle appropriately
                     
@@ -1406,15 +1421,10 @@ def generate_report():
                 employee_display_id = employee_id
                 # Don't add to query conditions if invalid
 
-        # Fetch Fuel claims
-        fuel_claims_query = f"SELECT SUM(Amount) FROM claim {query_conditions} AND Category = 'Fuel'"
-        fuel_claims = db.fetch_data(fuel_claims_query, params)
-        fuel_total = fuel_claims[0][0] if fuel_claims and fuel_claims[0][0] is not None else 0
-
-        # Fetch OPD claims
-        opd_claims_query = f"SELECT SUM(Amount) FROM claim {query_conditions} AND Category = 'OPD'"
-        opd_claims = db.fetch_data(opd_claims_query, params)
-        opd_total = opd_claims[0][0] if opd_claims and opd_claims[0][0] is not None else 0
+        # Fetch Fuel and OPD claims (whole months come from the roll-up)
+        totals = category_totals(db, period_start, period_end, emp_id=report_emp_id, replica=True)
+        fuel_total = totals.get('Fuel', 0)
+        opd_total = totals.get('OPD', 0)
 
         total_claims = (fuel_total or 0) + (opd_total or 0)
 
@@ -1441,8 +1451,8 @@ def generate_report():
 
 @app.route('/get_employees', methods=['GET'])
 def get_employees():
-    employees = db.fetch_data("SELECT EmpID, FirstName, LastName FROM employee")
-    employee_list = [{"id": emp[0], "name": f"{emp[1]} {emp[2]}"} for emp in employees]
+    employees = db.fetch_data("SELECT EmpID, FirstName, LastName FROM employee", named=True, cache=True)
+    employee_list = [{"id": emp.EmpID, "name": f"{emp.FirstName} {emp.LastName}"} for emp in employees]
     return jsonify(employee_list)
 
 
@@ -1452,31 +1462,25 @@ def download_pdf():
     end_date = request.args.get('end_date')
     employee_id = request.args.get('employee_id')
 
-    query_conditions = "WHERE Status = 'Approved' AND DateOfRequest BETWEEN %s AND %s"
-    params = [start_date, end_date]
+    try:
+        period_start, period_end = period_bounds(start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     # Fetch employee name and ID for individual reports
     employee_name = "All Employees"
     employee_display_id = "All"
     if employee_id:
-        query_conditions += " AND EmpID = %s"
-        params.append(employee_id)
-        
         emp_query = "SELECT EmpID, FirstName, LastName FROM employee WHERE EmpID = %s"
-        emp_result = db.fetch_data(emp_query, [employee_id])
+        emp_result = db.fetch_data(emp_query, [employee_id], replica=True, named=True)
         if emp_result:
-            employee_display_id = emp_result[0][0]
-            employee_name = f"{emp_result[0][1]} {emp_result[0][2]}"
-
-    # Fetch Fuel claims
-    fuel_claims_query = f"SELECT SUM(Amount) FROM claim {query_conditions} AND Category = 'Fuel'"
-    fuel_claims = db.fetch_data(fuel_claims_query, params)
-    fuel_total = fuel_claims[0][0] if fuel_claims and fuel_claims[0][0] is not None else 0
+            employee_display_id = emp_result[0].EmpID
+            employee_name = f"{emp_result[0].FirstName} {emp_result[0].LastName}"
 
-    # Fetch OPD claims
-    opd_claims_query = f"SELECT SUM(Amount) FROM claim {query_conditions} AND Category = 'OPD'"
-    opd_claims = db.fetch_data(opd_claims_query, params)
-    opd_total = opd_claims[0][0] if opd_claims and opd_claims[0][0] is not None else 0
+    # Fetch Fuel and OPD claims (whole months come from the roll-up)
+    totals = category_totals(db, period_start, period_end, emp_id=employee_id or None, replica=True)
+    fuel_total = totals.get('Fuel', 0)
+    opd_total = totals.get('OPD', 0)
 
     total_claims = fuel_total + opd_total
 
@@ -1571,32 +1575,26 @@ def download_excel():
     employee_id = request.args.get('employee_id')
     
     # Construct SQL queries dynamically
-    query_conditions = "WHERE Status = 'Approved' AND DateOfRequest BETWEEN %s AND %s"
-    params = [start_date, end_date]
+    try:
+        period_start, period_end = period_bounds(start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Get employee details for individual reports
     employee_name = "All Employees"
     employee_display_id = "All"
     if employee_id:
-        query_conditions += " AND EmpID = %s"
-        params.append(employee_id)
-        
         # Fetch employee details
         emp_query = "SELECT EmpID, FirstName, LastName FROM employee WHERE EmpID = %s"
-        emp_result = db.fetch_data(emp_query, [employee_id])
+        emp_result = db.fetch_data(emp_query, [employee_id], replica=True, named=True)
         if emp_result:
-            employee_display_id = emp_result[0][0]
-            employee_name = f"{emp_result[0][1]} {emp_result[0][2]}"
+            employee_display_id = emp_result[0].EmpID
+            employee_name = f"{emp_result[0].FirstName} {emp_result[0].LastName}"
 
-    # Query for Fuel claims
-    fuel_claims_query = f"SELECT SUM(Amount) FROM claim {query_conditions} AND Category = 'Fuel'"
-    fuel_claims = db.fetch_data(fuel_claims_query, params)
-    fuel_total = fuel_claims[0][0] if fuel_claims and fuel_claims[0][0] is not None else 0
-
-    # Query for OPD claims
-    opd_claims_query = f"SELECT SUM(Amount) FROM claim {query_conditions} AND Category = 'OPD'"
-    opd_claims = db.fetch_data(opd_claims_query, params)
-    opd_total = opd_claims[0][0] if opd_claims and opd_claims[0][0] is not None else 0
+    # Query for Fuel and OPD claims (whole months come from the roll-up)
+    totals = category_totals(db, period_start, period_end, emp_id=employee_id or None, replica=True)
+    fuel_total = totals.get('Fuel', 0)
+    opd_total = totals.get('OPD', 0)
 
     # Calculate total claims
     total_claims = (fuel_total or 0) + (opd_total or 0)
@@ -1636,53 +1634,55 @@ def stationary():
     today_date = date.today()
     admin_name = session.get('admin_name')
 
+    current_month = today_date.month
+    current_year = today_date.year
+
+    # half-open date bounds keep the date columns bare so their indexes serve the range;
+    # the month totals come from the monthly roll-up
+    today_filter, today_params = period_filter('ca.DateOfApproval', start_date=today_date, end_date=today_date)
+    month_params = (current_year, current_month)
+
     # fetch today's claims from the database
     today_claims_query = f"""
             SELECT SUM(c.Amount) AS TotalApprovedAmount
             FROM claim c
             INNER JOIN claimapproval ca ON c.ClaimID = ca.ClaimID
             WHERE c.Status = 'Approved' 
-            AND ca.DateOfApproval = '{today_date}'
+            AND {today_filter}
         """
-    today_claims = db.fetch_data(today_claims_query)
-
-    # handle cases where there are no claims
-    today_claims_total = today_claims[0][0] if today_claims and today_claims[0][0] is not None else 0
-
-    current_month = today_date.month
-    current_year = today_date.year
 
     # calculate the total claims for the current month
-    monthly_claims_query = f"""
-            SELECT SUM(Amount) 
-            FROM claim 
-            WHERE Status = 'Approved' 
-              AND EXTRACT(MONTH FROM DateOfRequest) = %s 
-              AND EXTRACT(YEAR FROM DateOfRequest) = %s
+    monthly_claims_query = """
+            SELECT SUM(TotalAmount) 
+            FROM claimrollup 
+            WHERE ClaimYear = %s AND ClaimMonth = %s
         """
-    monthly_claims_result = db.fetch_data(monthly_claims_query, (current_month, current_year))
-
-    # extract the value or set to 0 if no claims found
-    monthly_claims = monthly_claims_result[0][0] if monthly_claims_result and monthly_claims_result[0][0] else 0
 
     # calculate monthly stationary claims
-    monthly_stationary_claims_query = f"""
-                SELECT SUM(Amount) 
-                FROM claim 
-                WHERE Status = 'Approved' 
-                  AND Category = 'Stationary' 
-                  AND EXTRACT(MONTH FROM DateOfRequest) = %s 
-                  AND EXTRACT(YEAR FROM DateOfRequest) = %s
+    monthly_stationary_claims_query = """
+                SELECT SUM(TotalAmount) 
+                FROM claimrollup 
+                WHERE ClaimYear = %s AND ClaimMonth = %s
+                  AND Category = 'Stationary'
             """
-    monthly_stationary_claims_result = db.fetch_data(monthly_stationary_claims_query, (current_month, current_year))
-    monthly_stationary_claims = monthly_stationary_claims_result[0][0] if monthly_stationary_claims_result and \
-                                                                          monthly_stationary_claims_result[0][0] else 0
+
+    queries = {
+        'today_claims': (today_claims_query, today_params),
+        'monthly_claims': (monthly_claims_query, month_params),
+        'monthly_stationary_claims': (monthly_stationary_claims_query, month_params),
+    }
 
     # handle month/year selection form
+    error = None
     if request.method == 'POST':
-        selected_month = request.form.get('month')
-        selected_year = request.form.get('year')
+        try:
+            selected_month = int(request.form.get('month') or current_month)
+            selected_year = int(request.form.get('year') or current_year)
+            selected_filter, selected_params = period_filter('c.DateOfRequest', year=selected_year, month=selected_month)
+        except ValueError:
+            error = "Please select a valid month and year."
 
+    if request.method == 'POST' and error is None:
         # fetch claims for the selected month and year
         employee_claims_query = f"""
                     SELECT e.EmpID, e.FirstName, e.LastName, 
@@ -1693,15 +1693,31 @@ def stationary():
                     FROM employee e
                     LEFT JOIN claim c ON e.EmpID = c.EmpID
                     LEFT JOIN claimapproval ca ON c.ClaimID = ca.ClaimID
-                    WHERE EXTRACT(MONTH FROM c.DateOfRequest) = %s 
-                      AND EXTRACT(YEAR FROM c.DateOfRequest) = %s
+                    WHERE {selected_filter}
                       AND c.Status = 'Approved'
                     GROUP BY e.EmpID, e.FirstName, e.LastName
                     ORDER BY e.EmpID;
                 """
+        queries['employee_claims'] = (employee_claims_query, selected_params)
+
+    # the totals are independent, so run them concurrently on pooled connections
+    results = db.fetch_concurrently(queries, replica=True)
+
+    # handle cases where there are no claims
+    today_claims = results['today_claims']
+    today_claims_total = today_claims[0][0] if today_claims and today_claims[0][0] is not None else 0
 
+    # extract the value or set to 0 if no claims found
+    monthly_claims_result = results['monthly_claims']
+    monthly_claims = monthly_claims_result[0][0] if monthly_claims_result and monthly_claims_result[0][0] else 0
+
+    monthly_stationary_claims_result = results['monthly_stationary_claims']
+    monthly_stationary_claims = monthly_stationary_claims_result[0][0] if monthly_stationary_claims_result and \
+                                                                          monthly_stationary_claims_result[0][0] else 0
+
+    if request.method == 'POST' and error is None:
         # fetch employee claims data for the selected month/year
-        employee_claims = db.fetch_data(employee_claims_query, (selected_month, selected_year))
+        employee_claims = results['employee_claims']
         # Handle download action
         return render_template(
             'stationary_admin.html',
@@ -1722,8 +1738,8 @@ def stationary():
         selected_month=current_month,
         selected_year=current_year,
         admin_name=admin_name,
-    )
-
+        error=error
+    ), 400 if error else 200
 
 if __name__ == '__main__':
     port = int(os.getenv("PORT", 5000))
@@ -0,0 +1,119 @@
+import json
+
+
+""" Claim details for the claim modals """
+
+# The claim lists render one summary row per claim; the modals ask for a single claim's
+# details when they open. Claim queries select the images as one aggregated column
+# (CLAIM_IMAGES), so each claim arrives as one row however many images it has, and
+# claim_detail() turns such a row into the nested dict the templates read.
+
+# the claim's [[ImageID, Image], ...] as one JSON value, NULL without images; a
+# correlated subquery on claimimage(ClaimID) rather than a join, so the claim,
+# employee and admin columns are not repeated once per image
+CLAIM_IMAGES = """(
+        SELECT JSON_ARRAYAGG(JSON_ARRAY(ci.ImageID, ci.Image))
+        FROM claimimage ci
+        WHERE ci.ClaimID = c.ClaimID
+    ) AS Images"""
+
+EMPLOYEE_CLAIM_QUERY = f"""
+    SELECT
+        c.ClaimID, c.DateOfRequest, c.Category, c.Amount, c.Status, c.EmpMessage,
+        e.FirstName, e.LastName,
+        a.FirstName AS AdminFirstName, a.LastName AS AdminLastName, a.Email AS AdminEmail, a.TpNo AS AdminTpNo,
+        ca.DateOfApproval, ca.AdminMessage,
+        {CLAIM_IMAGES}
+    FROM claim c
+    JOIN employee e ON e.EmpID = c.EmpID
+    JOIN claimapproval ca ON ca.ClaimID = c.ClaimID
+    JOIN admin a ON a.AdminID = ca.AdminID
+    WHERE c.ClaimID = %s AND c.EmpID = %s
+"""
+
+ADMIN_CLAIM_QUERY = f"""
+    SELECT
+        c.ClaimID, c.EmpID, c.DateOfRequest, c.Category, c.Amount, c.Status, c.EmpMessage,
+        e.FirstName, e.LastName, e.Email, e.SBU, e.TpNo,
+        a.FirstName AS AdminFirstName, a.LastName AS AdminLastName, a.Email AS AdminEmail, a.TpNo AS AdminTpNo,
+        ca.DateOfApproval, ca.AdminMessage,
+        {CLAIM_IMAGES}
+    FROM claim c
+    JOIN employee e ON e.EmpID = c.EmpID
+    LEFT JOIN claimapproval ca ON ca.ClaimID = c.ClaimID
+    LEFT JOIN admin a ON a.AdminID = ca.AdminID
+    WHERE c.ClaimID = %s
+"""
+
+EMPLOYEE_CONTACT = ('Email', 'SBU', 'TpNo')
+
+
+def _day(value):
+    return value.strftime('%d-%m-%Y') if value else None
+
+
+def claim_images(value):
+    """Image filenames, in upload order, from a CLAIM_IMAGES value."""
+    if not value:
+        return []
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode()
+    if isinstance(value, str):
+        value = json.loads(value)
+    return [image for _, image in sorted(value, key=lambda pair: pair[0]) if image]
+
+
+def claim_detail(row):
+    """
+    One named claim row (with CLAIM_IMAGES) as the nested dict the modals read.
+    Sections follow the columns the query selected: EmpID and the employee's
+    contact details when present, and Admin/Approval (None until an admin has
+    decided) when the admin columns are.
+    """
+    fields = row._fields
+    detail = {'ClaimID': row.ClaimID}
+    if 'EmpID' in fields:
+        detail['EmpID'] = row.EmpID
+    detail.update({
+        'DateOfRequest': _day(row.DateOfRequest),
+        'Amount': row.Amount,
+        'Category': row.Category,
+        'Status': row.Status,
+        'EmpMessage': row.EmpMessage,
+        'Employee': {
+            'FirstName': row.FirstName,
+            'LastName': row.LastName,
+        },
+        'Images': claim_images(row.Images)
+    })
+    detail['Employee'].update({column: getattr(row, column) for column in EMPLOYEE_CONTACT if column in fields})
+    if 'AdminFirstName' in fields:
+        decided = row.AdminFirstName is not None
+        detail['Admin'] = {
+            'FirstName': row.AdminFirstName,
+            'LastName': row.AdminLastName,
+            'Email': row.AdminEmail,
+            'TpNo': row.AdminTpNo
+        } if decided else None
+        detail['Approval'] = {
+            'DateOfApproval': _day(row.DateOfApproval),
+            'AdminMessage': row.AdminMessage
+        } if decided else None
+    return detail
+
+
+def claim_details(db, query, params=()):
+    """claim_detail() for every row of a claim query, in query order."""
+    return [claim_detail(row) for row in db.fetch_data(query, params, named=True)]
+
+
+def employee_claim_detail(db, claim_id, emp_id):
+    """One of the employee's own claims an admin has decided on; None if there is no such claim."""
+    details = claim_details(db, EMPLOYEE_CLAIM_QUERY, (claim_id, emp_id))
+    return details[0] if details else None
+
+
+def admin_claim_detail(db, claim_id):
+    """Any claim with its employee, images and decision; None if it does not exist."""
+    details = claim_details(db, ADMIN_CLAIM_QUERY, (claim_id,))
+    return details[0] if details else None
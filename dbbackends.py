@@ -0,0 +1,284 @@
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+try:
+    import mysql.connector
+    from mysql.connector.errors import InterfaceError, OperationalError
+except ImportError:
+    mysql = None
+
+
+class MySQLBackend:
+    """The production backend: mysql.connector connections in autocommit mode."""
+
+    name = 'mysql'
+    label = 'MySQL'
+
+    def __init__(self):
+        if mysql is None:
+            raise RuntimeError("mysql-connector-python is not installed")
+        self.Error = mysql.connector.Error
+        # errors raised when the server side of a connection has gone away
+        self.disconnect_errors = (InterfaceError, OperationalError)
+
+    def connect(self, host, user, password, database, port):
+        return mysql.connector.connect(
+            host=host,
+            user=user,
+            password=password,
+            database=database,
+            port=port,
+            autocommit=True
+        )
+
+
+""" Embedded SQLite backend for local profiling and benchmarking """
+
+# the tables app.py uses, with the column order its positional reads expect
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS employee (
+    EmpID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Email VARCHAR(255) NOT NULL UNIQUE,
+    Password VARCHAR(255) NOT NULL,
+    FirstName VARCHAR(100),
+    LastName VARCHAR(100),
+    NIC VARCHAR(20),
+    DOB DATE,
+    Gender VARCHAR(10),
+    SBU VARCHAR(100),
+    TpNo VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS admin (
+    AdminID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Email VARCHAR(255) NOT NULL UNIQUE,
+    Password VARCHAR(255) NOT NULL,
+    FirstName VARCHAR(100),
+    LastName VARCHAR(100),
+    TpNo VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS credit (
+    EmpID INTEGER PRIMARY KEY REFERENCES employee (EmpID) ON DELETE CASCADE,
+    FuelCreditLimit DECIMAL(10, 2) DEFAULT 0,
+    OPDCreditLimit DECIMAL(10, 2) DEFAULT 0,
+    FuelCreditBalance DECIMAL(10, 2) DEFAULT 0,
+    OPDCreditBalance DECIMAL(10, 2) DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS claim (
+    ClaimID INTEGER PRIMARY KEY AUTOINCREMENT,
+    EmpID INTEGER NOT NULL REFERENCES employee (EmpID) ON DELETE CASCADE,
+    Category VARCHAR(20) NOT NULL,
+    Amount DECIMAL(10, 2) NOT NULL,
+    Status VARCHAR(20) NOT NULL DEFAULT 'Pending',
+    EmpMessage TEXT,
+    DateOfRequest DATE
+);
+
+CREATE TABLE IF NOT EXISTS claimimage (
+    ImageID INTEGER PRIMARY KEY AUTOINCREMENT,
+    ClaimID INTEGER NOT NULL REFERENCES claim (ClaimID) ON DELETE CASCADE,
+    Image VARCHAR(255),
+    ImageHash VARCHAR(64)
+);
+
+CREATE TABLE IF NOT EXISTS claimapproval (
+    ClaimID INTEGER PRIMARY KEY REFERENCES claim (ClaimID) ON DELETE CASCADE,
+    AdminID INTEGER REFERENCES admin (AdminID),
+    DateOfApproval DATE,
+    AdminMessage TEXT
+);
+
+CREATE TABLE IF NOT EXISTS claimrollup (
+    ClaimYear INTEGER NOT NULL,
+    ClaimMonth INTEGER NOT NULL,
+    EmpID INTEGER NOT NULL,
+    Category VARCHAR(20) NOT NULL,
+    ClaimCount INTEGER NOT NULL DEFAULT 0,
+    TotalAmount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (ClaimYear, ClaimMonth, EmpID, Category)
+);
+"""
+
+# MySQL-only syntax used by app.py and its SQLite spelling
+MYSQL_DATE_PART = re.compile(r'\b(MONTH|YEAR|DAY)\s*\(\s*([\w.`]+)\s*\)', re.IGNORECASE)
+MYSQL_EXTRACT = re.compile(r'\bEXTRACT\s*\(\s*(MONTH|YEAR|DAY)\s+FROM\s+([\w.`]+)\s*\)', re.IGNORECASE)
+MYSQL_NOW = re.compile(r'\b(?:NOW|CURRENT_TIMESTAMP)\s*\(\s*\)', re.IGNORECASE)
+MYSQL_UPSERT = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.IGNORECASE)
+MYSQL_UPSERT_VALUES = re.compile(r'\bVALUES\s*\(\s*(\w+)\s*\)', re.IGNORECASE)
+MYSQL_LOCKING_READ = re.compile(r'\s+FOR\s+UPDATE\b', re.IGNORECASE)
+MYSQL_JSON_ARRAYAGG = re.compile(r'\bJSON_ARRAYAGG\s*\(', re.IGNORECASE)
+STRFTIME_FORMATS = {'MONTH': '%m', 'YEAR': '%Y', 'DAY': '%d'}
+
+
+def _date_part(match):
+    return f"CAST(strftime('{STRFTIME_FORMATS[match.group(1).upper()]}', {match.group(2)}) AS INTEGER)"
+
+
+@lru_cache(maxsize=1024)
+def translate_mysql(query):
+    """Rewrite the MySQL dialect app.py uses into SQLite: placeholders, date parts, NOW(), upserts, row locks, JSON aggregates."""
+    query = query.replace('%s', '?')
+    # sqlite has no row locks; transactions begin with BEGIN IMMEDIATE (see
+    # SQLiteConnection.start_transaction), so a locking read already runs under the
+    # database's single write lock and no other writer can change the row until COMMIT
+    query = MYSQL_LOCKING_READ.sub('', query)
+    query = MYSQL_EXTRACT.sub(_date_part, query)
+    query = MYSQL_DATE_PART.sub(_date_part, query)
+    query = MYSQL_NOW.sub("datetime('now', 'localtime')", query)
+    query = MYSQL_JSON_ARRAYAGG.sub('json_group_array(', query)
+    upsert = MYSQL_UPSERT.search(query)
+    if upsert:
+        tail = MYSQL_UPSERT_VALUES.sub(r'excluded.\1', query[upsert.end():])
+        query = query[:upsert.start()] + 'ON CONFLICT DO UPDATE SET' + tail
+    return query
+
+
+# store dates and decimals as text and read them back as the types MySQL returns
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+
+
+class SQLiteCursor:
+    """A sqlite3 cursor behind the slice of the mysql.connector cursor API DBConnection uses."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._fetched = 0
+        self._insert = False
+
+    def execute(self, query, params=()):
+        self._fetched = 0
+        self._insert = query.lstrip().upper().startswith(('INSERT', 'REPLACE'))
+        self._cursor.execute(translate_mysql(query), tuple(params))
+
+    def executemany(self, query, seq_of_params):
+        self._fetched = 0
+        self._insert = False
+        self._cursor.executemany(translate_mysql(query), [tuple(params) for params in seq_of_params])
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._fetched += len(rows)
+        return rows
+
+    def fetchmany(self, size=1):
+        rows = self._cursor.fetchmany(size)
+        self._fetched += len(rows)
+        return rows
+
+    @property
+    def rowcount(self):
+        # sqlite reports -1 for SELECTs; MySQL reports the rows read so far
+        return self._fetched if self._cursor.rowcount == -1 else self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        # MySQL returns the first ID of a multi-row INSERT, sqlite the last
+        if not self._insert or not self._cursor.lastrowid:
+            return self._cursor.lastrowid
+        return self._cursor.lastrowid - max(self._cursor.rowcount, 1) + 1
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """A sqlite3 connection behind the slice of the mysql.connector connection API DBConnection uses."""
+
+    unread_result = False
+
+    def __init__(self, database, busy_timeout=30):
+        uri = database.startswith('file:')
+        if database == ':memory:':
+            # pooled connections must all see the same in-memory database
+            database, uri = 'file:acornhr?mode=memory&cache=shared', True
+        # a writer waits up to busy_timeout seconds for another connection's lock
+        self._connection = sqlite3.connect(
+            database,
+            uri=uri,
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        if 'mode=memory' not in database:
+            # readers keep reading while a transaction writes
+            self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(SQLITE_SCHEMA)
+        self._open = True
+
+    def cursor(self, prepared=False, buffered=None, dictionary=None):
+        # sqlite3 keeps its own compiled statement cache, so prepared is accepted as is
+        return SQLiteCursor(self._connection.cursor())
+
+    def is_connected(self):
+        return self._open
+
+    def ping(self, reconnect=False):
+        self._connection.execute("SELECT 1")
+
+    def start_transaction(self):
+        # take the write lock up front: a deferred BEGIN that reads and then writes
+        # fails with "database is locked" when another writer got in first, without
+        # waiting out the busy timeout
+        self._connection.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        if self._connection.in_transaction:
+            self._connection.execute("COMMIT")
+
+    def rollback(self):
+        if self._connection.in_transaction:
+            self._connection.execute("ROLLBACK")
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        self._open = False
+        self._connection.close()
+
+
+class SQLiteBackend:
+    """Embedded backend; database is a file path or ':memory:'. host, user and password are ignored."""
+
+    name = 'sqlite'
+    label = 'SQLite'
+    Error = sqlite3.Error
+    # an embedded database never drops the connection
+    disconnect_errors = ()
+
+    def connect(self, host, user, password, database, port):
+        return SQLiteConnection(database)
+
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def get_backend(backend=None):
+    """Resolve a backend name ('mysql', 'sqlite') or pass a backend instance through."""
+    if backend is None:
+        backend = 'mysql'
+    if isinstance(backend, str):
+        try:
+            return BACKENDS[backend.lower()]()
+        except KeyError:
+            raise ValueError(f"Unknown database backend: {backend}")
+    return backend
@@ -1,5 +1,14 @@
 import sys
+import argparse
+import json
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime
 from dbconnection import DBConnection
+from claimdetails import ADMIN_CLAIM_QUERY
+from pagination import Page, keyset_clause
+from snapshots import CLAIMS_QUERY
 import os
 from dotenv import load_dotenv
 
@@ -7,12 +16,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Initialize the database connection with your config
+# DB_BACKEND=sqlite runs against an embedded database file for local profiling
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+
 db = DBConnection(
     host=os.getenv("DB_HOST", "107.173.146.16"),
     user=os.getenv("DB_USER", "acorn_user"),
     password=os.getenv("DB_PASSWORD", "Acorn_hr2025"),
-    database=os.getenv("DB_NAME", "acorn_hr"),
-    port=int(os.getenv("DB_PORT", "3306"))
+    database=os.getenv("DB_SQLITE_PATH", "acorn_hr.db") if DB_BACKEND == "sqlite" else os.getenv("DB_NAME", "acorn_hr"),
+    port=int(os.getenv("DB_PORT", "3306")),
+    backend=DB_BACKEND,
+    # compare DB_STATEMENT_CACHE_SIZE=0 (text protocol) with e.g. 64 (prepared statements)
+    statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "0"))
 )
 
 def check_database_connectivity():
@@ -32,7 +47,7 @@ def check_database_connectivity():
         # Step 1: Test basic connection
         print("Step 1: Testing basic connection...")
         db.connect()
-        if db.connection and db.connection.is_connected():
+        if db.is_connected():
             check_results['details'].append({'step': 'connection', 'status': 'success', 'message': 'Connected successfully'})
         else:
             raise Exception("Connection failed or not connected")
@@ -74,7 +89,225 @@ def check_database_connectivity():
     
     return check_results
 
+""" Latency and throughput probe """
+
+# the app's hot queries, with params filled from sample rows (see sample_params)
+# first pages of the keyset-paged claim lists (see pagination.keyset_clause)
+FIRST_PAGE = Page(None, int(os.getenv("CLAIMS_PAGE_SIZE", "25")))
+
+HOT_QUERIES = {
+    'signin_lookup': ("""
+        SELECT 'admin' AS Role, AdminID AS UserID, Password, FirstName, LastName FROM admin WHERE Email = %s
+        UNION ALL
+        SELECT 'employee' AS Role, EmpID AS UserID, Password, FirstName, LastName FROM employee WHERE Email = %s
+        ORDER BY Role
+        LIMIT 1
+    """, ('email', 'email')),
+    'credit_balance': ("SELECT FuelCreditBalance, OPDCreditBalance FROM credit WHERE EmpID = %s", ('emp_id',)),
+    'employee_claims': (CLAIMS_QUERY.format(page=keyset_clause('ClaimID', FIRST_PAGE)[0]), ('emp_id', 'page_limit')),
+    'claim_detail': ("SELECT EmpID, Category, Amount FROM claim WHERE ClaimID = %s", ('claim_id',)),
+    'claim_modal': (ADMIN_CLAIM_QUERY, ('claim_id',)),
+    'duplicate_invoice': ("""
+        SELECT ci.ImageHash, c.Status, c.DateOfRequest
+        FROM claimimage ci
+        JOIN claim c ON c.ClaimID = ci.ClaimID
+        WHERE ci.ImageHash IN (%s) AND c.Status IN ('Approved', 'Pending')
+    """, ('image_hash',)),
+    'pending_claims': ("SELECT ClaimID, EmpID, DateOfRequest, Amount, Category FROM claim WHERE claim.Status = 'Pending'"
+                       + keyset_clause('claim.ClaimID', FIRST_PAGE)[0], ('page_limit',)),
+    'dashboard_month': ("SELECT SUM(TotalAmount) FROM claimrollup WHERE ClaimYear = %s AND ClaimMonth = %s", ('year', 'month')),
+    'dashboard_trend': ("SELECT ClaimMonth, SUM(TotalAmount) FROM claimrollup WHERE ClaimYear = %s GROUP BY ClaimMonth", ('year',)),
+}
+
+
+def log(message):
+    # progress goes to stderr so stdout stays valid JSON
+    print(message, file=sys.stderr)
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds for a list of durations in seconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(sample * 1000 for sample in samples)
+
+    def percentile(p):
+        return round(ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)], 3)
+
+    return {
+        'count': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'p50_ms': percentile(50),
+        'p90_ms': percentile(90),
+        'p99_ms': percentile(99),
+        'max_ms': round(ordered[-1], 3),
+        'mean_ms': round(sum(ordered) / len(ordered), 3),
+    }
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def sample_params():
+    """Real keys to probe with: the latest employee, claim and image hash, and this month."""
+    today = date.today()
+    values = {'email': '', 'emp_id': 0, 'claim_id': 0, 'image_hash': '', 'year': today.year, 'month': today.month,
+              'page_limit': keyset_clause('ClaimID', FIRST_PAGE)[1][-1]}
+    employee = db.fetch_data("SELECT EmpID, Email FROM employee ORDER BY EmpID DESC LIMIT 1")
+    if employee:
+        values['emp_id'], values['email'] = employee[0]
+    claim = db.fetch_data("SELECT ClaimID FROM claim ORDER BY ClaimID DESC LIMIT 1")
+    if claim:
+        values['claim_id'] = claim[0][0]
+    image = db.fetch_data("SELECT ImageHash FROM claimimage ORDER BY ImageID DESC LIMIT 1")
+    if image and image[0][0]:
+        values['image_hash'] = image[0][0]
+    return values
+
+
+def probe_connect(attempts):
+    """Time to open (and close) a fresh connection, bypassing the pool."""
+    samples = []
+    for _ in range(attempts):
+        start = time.perf_counter()
+        connection = db.backend.connect(db.host, db.user, db.password, db.database, db.port)
+        samples.append(time.perf_counter() - start)
+        connection.close()
+    return summarize(samples)
+
+
+def probe_round_trip(pings):
+    """SELECT 1 on a pooled connection: network plus server round-trip."""
+    db.fetch_data("SELECT 1")
+    return summarize([timed(db.fetch_data, "SELECT 1") for _ in range(pings)])
+
+
+def probe_queries(queries, iterations):
+    results = {}
+    for name, (query, params) in queries.items():
+        db.fetch_data(query, params)
+        results[name] = summarize([timed(db.fetch_data, query, params) for _ in range(iterations)])
+    return results
+
+
+def probe_throughput(queries, concurrency, duration):
+    """Run the hot queries round-robin from `concurrency` threads for `duration` seconds."""
+    statements = list(queries.values())
+    samples, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        local_samples, local_errors = [], 0
+        i = offset
+        try:
+            while time.perf_counter() < deadline:
+                query, params = statements[i % len(statements)]
+                i += 1
+                try:
+                    local_samples.append(timed(db.fetch_data, query, params))
+                except Exception:
+                    local_errors += 1
+        finally:
+            db.release()
+        with lock:
+            samples.extend(local_samples)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = summarize(samples)
+    result.update({
+        'concurrency': concurrency,
+        'errors': sum(errors),
+        'elapsed_s': round(elapsed, 3),
+        'queries_per_s': round(len(samples) / elapsed, 1) if elapsed else 0,
+    })
+    return result
+
+
+def run_probe(pings=100, iterations=50, connects=5, concurrency=(1, 4, 8, 16), duration=3.0, only=None):
+    """
+    Measure connect latency, round-trip percentiles, per-hot-query latency and
+    throughput at each concurrency level. Returns a JSON-serializable dict.
+    """
+    db.pool_max_size = max(db.pool_max_size, max(concurrency))
+    values = sample_params()
+    queries = {
+        name: (query, tuple(values[key] for key in keys))
+        for name, (query, keys) in HOT_QUERIES.items()
+        if not only or name in only
+    }
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'backend': db.backend.name,
+        'host': db.host,
+        'database': db.database,
+        'statement_cache_size': db.statement_cache_size,
+    }
+    log(f"Connect latency ({connects} connections)...")
+    report['connect'] = probe_connect(connects)
+    log(f"Round-trip time ({pings} pings)...")
+    report['round_trip'] = probe_round_trip(pings)
+    log(f"Hot query latency ({iterations} runs each)...")
+    report['queries'] = probe_queries(queries, iterations)
+    report['throughput'] = []
+    for level in concurrency:
+        log(f"Throughput at concurrency {level} ({duration}s)...")
+        report['throughput'].append(probe_throughput(queries, level, duration))
+    report['statements'] = db.statement_cache_stats()
+    return report
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database connectivity check and latency/throughput probe")
+    parser.add_argument('--probe', action='store_true', help="measure latency and throughput and print JSON")
+    parser.add_argument('--pings', type=int, default=100, help="SELECT 1 round trips to time")
+    parser.add_argument('--iterations', type=int, default=50, help="runs per hot query")
+    parser.add_argument('--connects', type=int, default=5, help="fresh connections to time")
+    parser.add_argument('--concurrency', default='1,4,8,16', help="comma-separated thread counts for the throughput test")
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds per concurrency level")
+    parser.add_argument('--queries', help=f"comma-separated subset of: {', '.join(HOT_QUERIES)}")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.probe:
+        only = set(args.queries.split(',')) if args.queries else None
+        if only and only - HOT_QUERIES.keys():
+            parser.error(f"unknown queries: {', '.join(sorted(only - HOT_QUERIES.keys()))}")
+        # connection messages go to stderr too, so stdout carries only the report
+        with redirect_stdout(sys.stderr):
+            try:
+                report = run_probe(
+                    pings=args.pings,
+                    iterations=args.iterations,
+                    connects=args.connects,
+                    concurrency=[int(level) for level in args.concurrency.split(',')],
+                    duration=args.duration,
+                    only=only
+                )
+            except Exception as e:
+                log(f"❌ Probe FAILED: {e}")
+                sys.exit(1)
+            finally:
+                db.disconnect()
+        output = json.dumps(report, indent=2, default=str)
+        print(output)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output + "\n")
+        sys.exit(0)
+
     # Run the check
     results = check_database_connectivity()
     
@@ -0,0 +1,330 @@
+import argparse
+import ast
+import os
+import re
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from dbconnection import DBConnection
+from claimdetails import CLAIM_IMAGES
+from pagination import Page, keyset_clause
+import rollup
+
+# Load environment variables
+load_dotenv()
+
+# Initialize the database connection with your config
+# DB_BACKEND=sqlite runs against an embedded database file for local profiling
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+
+db = DBConnection(
+    host=os.getenv("DB_HOST", "107.173.146.16"),
+    user=os.getenv("DB_USER", "acorn_user"),
+    password=os.getenv("DB_PASSWORD", "Acorn_hr2025"),
+    database=os.getenv("DB_SQLITE_PATH", "acorn_hr.db") if DB_BACKEND == "sqlite" else os.getenv("DB_NAME", "acorn_hr"),
+    port=int(os.getenv("DB_PORT", "3306")),
+    backend=DB_BACKEND
+)
+
+
+""" Index helpers """
+
+def existing_indexes(table):
+    """Column tuples of every index on table (primary key included), in index order."""
+    if db.backend.name == 'sqlite':
+        indexes = []
+        primary_key = [row[1] for row in sorted(db.fetch_data(f"PRAGMA table_info({table})"), key=lambda row: row[5]) if row[5]]
+        if primary_key:
+            indexes.append(tuple(primary_key))
+        for index in db.fetch_data(f"PRAGMA index_list({table})"):
+            columns = db.fetch_data(f"PRAGMA index_info({index[1]})")
+            indexes.append(tuple(column[2] for column in sorted(columns)))
+        return indexes
+
+    rows = db.fetch_data(
+        """
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """, (table,))
+    indexes = {}
+    for index_name, column_name in rows:
+        indexes.setdefault(index_name, []).append(column_name)
+    return [tuple(columns) for columns in indexes.values()]
+
+
+def ensure_index(name, table, columns):
+    """
+    Create the index unless one already leads with the same columns (a
+    primary key or foreign key index counts). Returns True if it was created.
+    """
+    wanted = tuple(column.lower() for column in columns)
+    for index in existing_indexes(table):
+        if tuple(column.lower() for column in index[:len(wanted)]) == wanted:
+            return False
+    db.execute_query(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+    return True
+
+
+""" Migrations """
+
+# indexes behind the hot lookups: signin, the duplicate-invoice check,
+# per-employee claim lists and balances, and the status/date aggregates
+HOT_PREDICATE_INDEXES = [
+    ('idx_employee_email', 'employee', ('Email',)),
+    ('idx_admin_email', 'admin', ('Email',)),
+    ('idx_claimimage_hash', 'claimimage', ('ImageHash',)),
+    ('idx_claimimage_claim', 'claimimage', ('ClaimID',)),
+    ('idx_credit_emp', 'credit', ('EmpID',)),
+    ('idx_claim_emp_claim', 'claim', ('EmpID', 'ClaimID')),
+    ('idx_claim_status_date', 'claim', ('Status', 'DateOfRequest')),
+]
+
+
+def create_hot_predicate_indexes():
+    created = []
+    for name, table, columns in HOT_PREDICATE_INDEXES:
+        if ensure_index(name, table, columns):
+            created.append(name)
+    return created
+
+
+# the admin claim lists filter on Status and page newest first by ClaimID
+PAGING_INDEXES = [
+    ('idx_claim_status_claim', 'claim', ('Status', 'ClaimID')),
+]
+
+
+def create_paging_indexes():
+    return [name for name, table, columns in PAGING_INDEXES if ensure_index(name, table, columns)]
+
+
+def create_claim_rollup():
+    db.execute_query(rollup.ROLLUP_TABLE)
+    rollup.rebuild(db)
+    return ['claimrollup']
+
+
+# (version, description, step) in the order they are applied; a step must be
+# safe to re-run, since `migrate --repair` replays every applied version
+MIGRATIONS = [
+    (1, 'indexes for hot predicates', create_hot_predicate_indexes),
+    (2, 'monthly claims roll-up', create_claim_rollup),
+    (3, 'indexes for keyset-paged claim lists', create_paging_indexes),
+]
+
+
+def migrations_table_exists():
+    if db.backend.name == 'sqlite':
+        return bool(db.fetch_data("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"))
+    return bool(db.fetch_data(
+        """
+        SELECT 1 FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'schema_migrations'
+        """))
+
+
+def recorded_versions():
+    """Versions recorded in schema_migrations; none before the first migrate. Read-only."""
+    if not migrations_table_exists():
+        return set()
+    return {row[0] for row in db.fetch_data("SELECT Version FROM schema_migrations")}
+
+
+def applied_versions():
+    db.execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            Version INT PRIMARY KEY,
+            Description VARCHAR(255) NOT NULL,
+            AppliedAt DATETIME NOT NULL
+        )
+    """)
+    return recorded_versions()
+
+
+def pending_migrations():
+    """
+    (version, description) of every migration not applied yet, in order. Only
+    reads, so the gunicorn master can check without DDL privileges.
+    """
+    applied = recorded_versions()
+    return [(version, description) for version, description, _ in MIGRATIONS if version not in applied]
+
+
+def migrate(repair=False):
+    """
+    Apply every pending migration in version order. With repair, also replay
+    applied ones so objects dropped by hand are recreated.
+    """
+    applied = applied_versions()
+    for version, description, step in MIGRATIONS:
+        if version in applied and not repair:
+            continue
+        created = step() or []
+        if version not in applied:
+            db.execute_query(
+                "INSERT INTO schema_migrations (Version, Description, AppliedAt) VALUES (%s, %s, %s)",
+                (version, description, datetime.now()))
+        action = "repaired" if version in applied else "applied"
+        detail = f" (created {', '.join(created)})" if created else ""
+        print(f"✅ {version:03d} {description}: {action}{detail}")
+
+
+def status():
+    applied = recorded_versions()
+    for version, description, _ in MIGRATIONS:
+        mark = "✅" if version in applied else "⏳"
+        print(f"{mark} {version:03d} {description}")
+
+
+def rebuild_rollup(check_only=False):
+    """Report roll-up buckets that disagree with claim; unless check_only, rebuild and report again."""
+    mismatches = rollup.check(db)
+    for key, expected, stored in mismatches:
+        print(f"❌ {key[0]}-{key[1]:02d} EmpID {key[2]} {key[3]}: claim has {expected}, roll-up has {stored}")
+    print(f"{len(mismatches)} roll-up bucket(s) out of step with claim")
+    if check_only:
+        return len(mismatches)
+    rows = rollup.rebuild(db)
+    print(f"✅ Rebuilt claimrollup ({rows} rows)")
+    return len(rollup.check(db))
+
+
+""" EXPLAIN verification """
+
+# stand-ins for the values app.py interpolates into f-string queries
+SAMPLE_VALUES = {
+    'selected_filter': "c.DateOfRequest >= %s AND c.DateOfRequest < %s",
+    'today_filter': "ca.DateOfApproval >= %s AND ca.DateOfApproval < %s",
+    'CLAIM_IMAGES': CLAIM_IMAGES,
+    'table': 'employee',
+    'key': 'EmpID',
+}
+
+# keyset clauses are rendered as app.py builds them for a page past a cursor, so the
+# plan checked is the real ORDER BY ... DESC LIMIT one
+SAMPLE_PAGE = Page(1, 25)
+
+
+def keyset_columns(tree):
+    """{name: [(line, column), ...]} for every `name, params = keyset_clause('column', page)`."""
+    columns = {}
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)):
+            continue
+        call, target = node.value, node.targets[0]
+        if (isinstance(call.func, ast.Name) and call.func.id == 'keyset_clause'
+                and isinstance(target, ast.Tuple) and isinstance(target.elts[0], ast.Name)
+                and call.args and isinstance(call.args[0], ast.Constant)):
+            columns.setdefault(target.elts[0].id, []).append((node.lineno, call.args[0].value))
+    return columns
+
+
+def sample_value(name, lineno, keysets):
+    # a keyset clause takes the column of the nearest assignment above the query
+    assigned = [column for line, column in keysets.get(name, ()) if line <= lineno]
+    if assigned:
+        return keyset_clause(assigned[-1], SAMPLE_PAGE)[0]
+    return SAMPLE_VALUES.get(name, '1')
+
+SQL_STATEMENT = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE)\s', re.IGNORECASE)
+
+
+def app_queries(path='app.py'):
+    """Every SQL string literal (f-strings rendered with sample values) in app.py, with its line."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    # f-string fragments and bare docstrings are not statements of their own
+    skip = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.JoinedStr):
+            skip.update(id(value) for value in node.values)
+        elif isinstance(node, ast.Expr):
+            skip.add(id(node.value))
+    keysets = keyset_columns(tree)
+    queries = []
+    for node in ast.walk(tree):
+        if id(node) in skip:
+            continue
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            text = node.value
+        elif isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(value.value)
+                else:
+                    name = value.value.id if isinstance(value.value, ast.Name) else None
+                    parts.append(sample_value(name, node.lineno, keysets))
+            text = ''.join(parts)
+        else:
+            continue
+        if SQL_STATEMENT.match(text):
+            queries.append((node.lineno, text))
+    return sorted(set(queries))
+
+
+def full_scans(query):
+    """Tables the plan for query reads with a full table scan."""
+    params = ('1',) * query.count('%s')
+    if db.backend.name == 'sqlite':
+        plan = db.fetch_data("EXPLAIN QUERY PLAN " + query, params)
+        scans = []
+        for row in plan:
+            detail = row[-1]
+            if detail.startswith('SCAN ') and ' USING ' not in detail:
+                scans.append(detail.split()[-1])
+        return scans
+
+    plan = db.fetch_data("EXPLAIN " + query, params, named=True)
+    return [f"{row.table} (~{row.rows} rows)" for row in plan if row.type == 'ALL']
+
+
+def explain_app_queries(path='app.py'):
+    flagged = 0
+    for lineno, query in app_queries(path):
+        summary = ' '.join(query.split())[:90]
+        try:
+            scans = full_scans(query)
+        except db.backend.Error as e:
+            print(f"⚠️  app.py:{lineno} could not EXPLAIN ({e}): {summary}")
+            continue
+        if scans and not re.search(r'\bWHERE\b', query, re.IGNORECASE):
+            # listings and exports without a filter read every row by design
+            print(f"ℹ️  app.py:{lineno} unfiltered read of {', '.join(scans)}: {summary}")
+        elif scans:
+            flagged += 1
+            print(f"❌ app.py:{lineno} full scan of {', '.join(scans)}: {summary}")
+        else:
+            print(f"✅ app.py:{lineno} {summary}")
+    return flagged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versioned schema migrations and query plan checks for AcornHR")
+    commands = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = commands.add_parser('migrate', help="apply pending migrations")
+    migrate_parser.add_argument('--repair', action='store_true', help="also replay applied migrations")
+    commands.add_parser('status', help="list migrations and whether they are applied")
+    rollup_parser = commands.add_parser('rollup', help="backfill the monthly claims roll-up from claim")
+    rollup_parser.add_argument('--check', action='store_true', help="only report buckets that disagree with claim")
+    explain_parser = commands.add_parser('explain', help="EXPLAIN every SQL statement in app.py and flag full scans")
+    explain_parser.add_argument('--app', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'))
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'migrate':
+            migrate(repair=args.repair)
+        elif args.command == 'status':
+            status()
+        elif args.command == 'rollup':
+            sys.exit(1 if rebuild_rollup(check_only=args.check) else 0)
+        else:
+            flagged = explain_app_queries(args.app)
+            print(f"\n{flagged} statement(s) with full table scans")
+            sys.exit(1 if flagged else 0)
+    finally:
+        db.disconnect()
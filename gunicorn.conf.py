@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+import threading
+
+# Gunicorn settings for AcornHR; gunicorn reads ./gunicorn.conf.py on start-up
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# requests spend most of their time waiting on MySQL, so a few processes with a
+# pool of threads each serve more requests per MB than many sync workers
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2, 4)))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# every request thread plus the dashboard fan-out workers may hold a connection
+os.environ.setdefault('DB_POOL_MAX_SIZE', str(threads + int(os.getenv('DB_FANOUT_WORKERS', '4'))))
+
+# import the app once in the master and fork it; the DB client opens no
+# connection at import, and any it did open would be dropped in the child
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then so slow leaks (PIL, pandas) cannot accumulate
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+
+
+def on_starting(server):
+    # refuse to serve against a schema the code does not match (e.g. no
+    # claimrollup yet); the Procfile release step normally applies migrations
+    import dbmigrate
+    try:
+        pending = dbmigrate.pending_migrations()
+    except Exception as e:
+        # an unreachable database is the pool's problem to report, not a schema mismatch
+        server.log.warning("Could not check schema migrations: %s", e)
+        return
+    finally:
+        dbmigrate.db.disconnect()
+    if pending:
+        listed = ', '.join(f"{version:03d} {description}" for version, description in pending)
+        raise SystemExit(f"Database schema is out of date (pending: {listed}). Run `python dbmigrate.py migrate`.")
+
+
+def post_worker_init(worker):
+    # open the pool's minimum connections and start the password hashing
+    # processes in the background so worker boot never waits on either
+    from app import db, passwords
+    threading.Thread(target=db.connect, name='db-warm-up', daemon=True).start()
+    threading.Thread(target=passwords.warm_up, name='hasher-warm-up', daemon=True).start()
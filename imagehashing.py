@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+""" Invoice image hashing off the request thread """
+
+# A claim can carry several multi-megapixel phone photos, and decoding and resizing
+# each one for its perceptual hash takes a good fraction of a second. Pillow releases
+# the GIL while it decodes and resamples, so a small thread pool hashes a submission's
+# images side by side without copying them to another process. The pool is shared by
+# every request thread in the worker: calls in flight (running + queued) are capped,
+# which also caps how many decoded images are held in memory at once, and each
+# submission gets a time budget for all of its images.
+
+
+class HashingTimeout(Exception):
+    """The images were not hashed within the request's time budget; retry shortly."""
+
+
+class ImageHashPool:
+    """
+    hash_all() runs a hash function over a submission's images on a bounded
+    ThreadPoolExecutor and returns the results in upload order. The pool is
+    started on first use in each process and dropped in a forked child.
+    """
+
+    def __init__(self, max_workers=4, max_queue=16, budget=10):
+        self.max_workers = max(int(max_workers), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._stats = {'images': 0, 'timeouts': 0}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # the parent's pool threads do not exist in the child
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='image-hash')
+            return self._executor
+
+    def _timed_out(self, futures):
+        for future in futures:
+            future.cancel()
+        with self._lock:
+            self._stats['timeouts'] += 1
+        raise HashingTimeout(f"Image hashing did not finish within {self.budget}s")
+
+    def hash_all(self, func, items):
+        """
+        [func(item) for item in items], computed concurrently. Waits for every
+        image; raises HashingTimeout once the budget is spent, and re-raises the
+        first exception func raised.
+        """
+        deadline = time.monotonic() + self.budget
+        futures = []
+        for item in items:
+            # wait for a free slot, but only as long as the budget allows
+            if not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                self._timed_out(futures)
+            try:
+                future = self._pool().submit(func, item)
+            except BaseException:
+                self._slots.release()
+                raise
+            future.add_done_callback(lambda _: self._slots.release())
+            futures.append(future)
+        with self._lock:
+            self._stats['images'] += len(futures)
+
+        _, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        if pending:
+            self._timed_out(futures)
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(max_workers=self.max_workers, max_queue=self.max_queue, budget=self.budget)
+        return stats
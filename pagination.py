@@ -0,0 +1,38 @@
+from collections import namedtuple
+
+
+""" Keyset pagination on ClaimID """
+
+# Claim lists are newest first and paged by ClaimID: the next page is "ClaimID < the
+# last id shown", which the primary key index answers without reading (or OFFSET-skipping)
+# the rows on earlier pages, so page N costs the same as page 1. Pages go one way,
+# newer to older; the first page is the one without a cursor.
+
+Page = namedtuple('Page', 'before size')
+
+
+def page_request(args, default_size=25, max_size=100):
+    """The cursor (?before=<ClaimID>) and page size (?size=, capped at max_size) from a query string."""
+    before = args.get('before', type=int)
+    size = args.get('size', default_size, type=int)
+    return Page(before if before and before > 0 else None, min(max(size, 1), max_size))
+
+
+def keyset_clause(column, page):
+    """
+    The condition and ORDER BY/LIMIT to append to a claim query's WHERE clause, and
+    their params. One row more than the page is fetched to tell whether an older
+    page exists (see split_page).
+    """
+    if page.before:
+        return f" AND {column} < %s ORDER BY {column} DESC LIMIT %s", [page.before, page.size + 1]
+    return f" ORDER BY {column} DESC LIMIT %s", [page.size + 1]
+
+
+def split_page(rows, page):
+    """(the rows on this page, the cursor for the next older page or None); rows are newest first, ClaimID first."""
+    rows = list(rows)
+    if len(rows) > page.size:
+        rows = rows[:page.size]
+        return rows, rows[-1][0]
+    return rows, None
@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.hash import bcrypt
+
+
+""" Password hashing off the request threads """
+
+# bcrypt at cost 12 is a few hundred ms of CPU per call. Run inline, a burst of
+# sign-ins holds the GIL and stalls every other request in the worker, so hashing
+# and verification go to a small process pool instead. The number of calls in
+# flight (running + queued) is capped; past the cap callers get HasherBusy at once
+# and the route answers 503 instead of queueing behind the burst.
+
+
+# $2b$12$... -> the cost factor (log2 rounds)
+BCRYPT_COST = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class HasherBusy(Exception):
+    """The hashing pool is saturated or did not answer in time; retry shortly."""
+
+
+def _verify(password, stored_hash):
+    try:
+        return bcrypt.verify(password, stored_hash)
+    except (ValueError, TypeError):
+        # not a bcrypt hash (or empty); treat as a failed match
+        return False
+
+
+def _hash(password, rounds):
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _noop():
+    return None
+
+
+class PasswordHasher:
+    """
+    bcrypt hash/verify on a bounded ProcessPoolExecutor. The pool is started on
+    first use in each process (and dropped in a forked child), so importing the
+    app under gunicorn --preload starts no processes in the master.
+    """
+
+    def __init__(self, rounds=12, max_workers=2, max_queue=8, timeout=10):
+        self.rounds = int(rounds)
+        self.max_workers = max(int(max_workers), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._stats = {'calls': 0, 'rejected': 0, 'timeouts': 0}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # the parent's pool processes and semaphore holders are not ours
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a threaded worker process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HasherBusy("Password hashing queue is full")
+        try:
+            future = self._pool().submit(func, *args)
+            with self._lock:
+                self._stats['calls'] += 1
+        except BrokenProcessPool:
+            self._slots.release()
+            with self._lock:
+                self._executor = None
+            raise HasherBusy("Password hashing pool restarted")
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise HasherBusy(f"Password hashing did not finish within {self.timeout}s")
+        except BrokenProcessPool:
+            # a pool process died (e.g. OOM-killed); start a fresh pool next call
+            with self._lock:
+                if self._executor is not None and getattr(self._executor, '_broken', False):
+                    self._executor = None
+            raise HasherBusy("Password hashing pool restarted")
+
+    def verify(self, password, stored_hash):
+        if not password or not stored_hash:
+            return False
+        return self._run(_verify, password, stored_hash)
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def needs_rehash(self, stored_hash):
+        """True for a bcrypt hash whose cost is below the current policy."""
+        match = BCRYPT_COST.match(stored_hash or '')
+        return bool(match) and int(match.group(1)) < self.rounds
+
+    def rehash_later(self, password, store):
+        """
+        Hash password at the policy cost on the pool and pass the new hash to
+        store(new_hash) on a background thread, without waiting for either.
+        Skipped (returns False) when the pool is saturated; the next sign-in retries.
+        """
+        if not self._slots.acquire(blocking=False):
+            return False
+        try:
+            future = self._pool().submit(_hash, password, self.rounds)
+        except BaseException:
+            self._slots.release()
+            return False
+
+        def done(future):
+            self._slots.release()
+            if not future.cancelled() and future.exception() is None:
+                threading.Thread(target=store, args=(future.result(),), name='password-rehash', daemon=True).start()
+
+        future.add_done_callback(done)
+        return True
+
+    def warm_up(self):
+        """Start the pool processes now rather than on the first sign-in."""
+        for future in [self._pool().submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(max_workers=self.max_workers, max_queue=self.max_queue)
+        return stats
@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta
+
+
+""" Period filters for report and dashboard aggregates """
+
+# Every month/year/date-range selection becomes a half-open [start, end) bound on the
+# bare column, e.g. "DateOfRequest >= %s AND DateOfRequest < %s". Unlike MONTH(col) = X
+# or EXTRACT(YEAR FROM col) = Y, the column is not wrapped in a function, so an index on
+# it can serve the range, and an exclusive upper bound covers DATETIME values on the
+# last day, which BETWEEN on a date silently drops.
+
+
+def to_date(value):
+    """Accept a date, a datetime or an ISO 'YYYY-MM-DD' string (as posted by a date input)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        raise ValueError("A date is required")
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def month_bounds(year, month):
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {month}")
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def year_bounds(year):
+    year = int(year)
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def range_bounds(start_date, end_date):
+    """An inclusive start_date..end_date selection as a half-open range."""
+    start, last = to_date(start_date), to_date(end_date)
+    if last < start:
+        raise ValueError("End date is before start date")
+    return start, last + timedelta(days=1)
+
+
+def period_bounds(year=None, month=None, start_date=None, end_date=None):
+    """
+    Half-open (start, end) dates for one selection: a date range, a month of a year,
+    or a whole year.
+    """
+    if start_date is not None or end_date is not None:
+        return range_bounds(start_date, end_date)
+    if year is None:
+        raise ValueError("A year or a date range is required")
+    if month is not None:
+        return month_bounds(year, month)
+    return year_bounds(year)
+
+
+def period_filter(column='DateOfRequest', **selection):
+    """
+    SQL predicate and params bounding column to a period, ready to AND into a WHERE
+    clause. selection takes the keywords of period_bounds.
+    """
+    start, end = period_bounds(**selection)
+    return f"{column} >= %s AND {column} < %s", [start, end]
@@ -0,0 +1,46 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+""" Token-bucket throttling """
+
+
+class TokenBuckets:
+    """
+    One token bucket per key (an IP address, an account): `burst` tokens,
+    refilled at `rate` tokens per second. At most `max_keys` buckets are kept;
+    the least recently used are dropped first, so a spray of random keys cannot
+    grow memory without bound. State is per process.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.max_keys = max(int(max_keys), 1)
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, tokens=1):
+        """
+        Spend tokens from key's bucket. Returns 0 if allowed, otherwise the
+        seconds until enough tokens will have refilled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            available, updated = self._buckets.pop(key, (self.burst, now))
+            available = min(self.burst, available + (now - updated) * self.rate)
+            if available >= tokens:
+                available -= tokens
+                wait = 0
+            else:
+                wait = (tokens - available) / self.rate if self.rate > 0 else math.inf
+            self._buckets[key] = (available, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
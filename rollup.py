@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+
+""" Monthly claims roll-up """
+
+# claimrollup holds one row per (year, month, employee, category) of *approved* claims,
+# keyed on the DateOfRequest month, so admin aggregates read a few hundred summary rows
+# instead of the claim history. It is kept current inside the same transaction as every
+# write that moves a claim into or out of 'Approved' (see track_claim), and can be
+# rebuilt from claim at any time with `python dbmigrate.py rollup`.
+
+CENT = Decimal('0.01')
+
+ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS claimrollup (
+        ClaimYear INT NOT NULL,
+        ClaimMonth INT NOT NULL,
+        EmpID INT NOT NULL,
+        Category VARCHAR(20) NOT NULL,
+        ClaimCount INT NOT NULL DEFAULT 0,
+        TotalAmount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (ClaimYear, ClaimMonth, EmpID, Category)
+    )
+"""
+
+ROLLUP_UPSERT = """
+    INSERT INTO claimrollup (ClaimYear, ClaimMonth, EmpID, Category, ClaimCount, TotalAmount)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        ClaimCount = ClaimCount + VALUES(ClaimCount),
+        TotalAmount = TotalAmount + VALUES(TotalAmount)
+"""
+
+ROLLUP_SOURCE = """
+    SELECT YEAR(DateOfRequest), MONTH(DateOfRequest), EmpID, Category, COUNT(*), SUM(Amount)
+    FROM claim
+    WHERE Status = 'Approved' AND DateOfRequest IS NOT NULL
+    GROUP BY YEAR(DateOfRequest), MONTH(DateOfRequest), EmpID, Category
+"""
+
+
+def claim_state(db, claim_id):
+    """The columns the roll-up depends on, locked for the rest of the transaction; None if the claim is gone."""
+    rows = db.fetch_data(
+        "SELECT EmpID, Category, Amount, Status, DateOfRequest FROM claim WHERE ClaimID = %s FOR UPDATE",
+        (claim_id,), named=True)
+    return rows[0] if rows else None
+
+
+def _apply(db, claim, sign):
+    if claim is None or claim.Status != 'Approved' or claim.DateOfRequest is None:
+        return
+    db.execute_query(ROLLUP_UPSERT, (
+        claim.DateOfRequest.year, claim.DateOfRequest.month, claim.EmpID, claim.Category,
+        sign, sign * Decimal(str(claim.Amount))))
+
+
+def record_transition(db, before, after):
+    """Move a claim's contribution from its old (year, month, employee, category) bucket to its new one."""
+    if before == after:
+        return
+    _apply(db, before, -1)
+    _apply(db, after, 1)
+
+
+@contextmanager
+def track_claim(db, claim_id):
+    """
+    Keep the roll-up in step with whatever the block does to one claim (status change,
+    edit or delete). Must run inside db.transaction() so both writes commit together.
+    """
+    before = claim_state(db, claim_id)
+    yield
+    record_transition(db, before, claim_state(db, claim_id))
+
+
+def forget_employee(db, emp_id):
+    db.execute_query("DELETE FROM claimrollup WHERE EmpID = %s", (emp_id,))
+
+
+def rebuild(db):
+    """Recompute the whole roll-up from claim in one transaction."""
+    with db.transaction():
+        db.execute_query("DELETE FROM claimrollup")
+        db.execute_query(
+            "INSERT INTO claimrollup (ClaimYear, ClaimMonth, EmpID, Category, ClaimCount, TotalAmount)"
+            + ROLLUP_SOURCE)
+    return db.fetch_data("SELECT COUNT(*) FROM claimrollup")[0][0]
+
+
+def _cents(amount):
+    return Decimal(str(amount or 0)).quantize(CENT)
+
+
+def check(db):
+    """
+    Buckets where the roll-up disagrees with claim, as
+    [((year, month, emp_id, category), (count, amount) expected, (count, amount) stored)].
+    """
+    expected = {tuple(row[:4]): (row[4], _cents(row[5])) for row in db.fetch_data(ROLLUP_SOURCE)}
+    stored = {
+        tuple(row[:4]): (row[4], _cents(row[5]))
+        for row in db.fetch_data(
+            "SELECT ClaimYear, ClaimMonth, EmpID, Category, ClaimCount, TotalAmount FROM claimrollup")
+        if row[4]
+    }
+    return [
+        (key, expected.get(key), stored.get(key))
+        for key in sorted(expected.keys() | stored.keys())
+        if expected.get(key) != stored.get(key)
+    ]
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(day):
+    return date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+
+
+def category_totals(db, start, end, emp_id=None, replica=False):
+    """
+    Approved totals per category for DateOfRequest in [start, end). Whole months are read
+    from the roll-up; partial months at either edge fall back to an indexed range on claim.
+    """
+    first_month = start if start.day == 1 else _next_month(start)
+    last_month = _month_start(end)
+    claim_ranges = []
+    parts, params = [], []
+
+    if first_month < last_month:
+        if start < first_month:
+            claim_ranges.append((start, first_month))
+        if last_month < end:
+            claim_ranges.append((last_month, end))
+        parts.append("""
+            SELECT Category, SUM(TotalAmount) FROM claimrollup
+            WHERE (ClaimYear, ClaimMonth) >= (%s, %s) AND (ClaimYear, ClaimMonth) < (%s, %s)""")
+        params += [first_month.year, first_month.month, last_month.year, last_month.month]
+        if emp_id is not None:
+            parts[-1] += " AND EmpID = %s"
+            params.append(emp_id)
+        parts[-1] += " GROUP BY Category"
+    else:
+        claim_ranges.append((start, end))
+
+    for range_start, range_end in claim_ranges:
+        parts.append("""
+            SELECT Category, SUM(Amount) FROM claim
+            WHERE Status = 'Approved' AND DateOfRequest >= %s AND DateOfRequest < %s""")
+        params += [range_start, range_end]
+        if emp_id is not None:
+            parts[-1] += " AND EmpID = %s"
+            params.append(emp_id)
+        parts[-1] += " GROUP BY Category"
+
+    totals = {}
+    for category, amount in db.fetch_data(" UNION ALL ".join(parts), params, replica=replica):
+        totals[category] = totals.get(category, 0) + Decimal(str(amount or 0))
+    return totals
@@ -0,0 +1,79 @@
+from collections import namedtuple
+
+from dbconnection import ResultCache
+from pagination import Page, keyset_clause, split_page
+
+
+""" Per-employee snapshot for the employee pages """
+
+# emp_dashboard and emp_form read the same credit row and claim history on every
+# load. A snapshot loads them in two queries (the credit row, then one page of claim
+# summaries; the details behind "More Details" are fetched per claim when the modal
+# opens) and keeps the result for a few seconds per employee and page. Writes that
+# touch an employee's credit or claims call invalidate(); entries are also keyed by a
+# version the app keeps in the employee's session, so their own changes show up at
+# once on any worker process.
+
+Credit = namedtuple('Credit', 'fuel_credit_limit opd_credit_limit fuel_credit_balance opd_credit_balance')
+EmployeeSnapshot = namedtuple('EmployeeSnapshot', 'credit claims older_cursor')
+
+NO_CREDIT = Credit(0, 0, 0, 0)
+
+CREDIT_QUERY = """
+    SELECT FuelCreditLimit, OPDCreditLimit, FuelCreditBalance, OPDCreditBalance
+    FROM credit
+    WHERE EmpID = %s
+"""
+
+# {page} is the keyset condition, ORDER BY and LIMIT (pagination.keyset_clause)
+CLAIMS_QUERY = """
+    SELECT ClaimID, DateOfRequest, Category, Amount, Status
+    FROM claim
+    WHERE EmpID = %s{page}
+"""
+
+
+class EmployeeSnapshots:
+    """Short-lived, per-employee cache of credit and claims, invalidated on change."""
+
+    def __init__(self, db, ttl=15, max_entries=1024):
+        self.db = db
+        self._cache = ResultCache(max_entries, ttl)
+
+    @staticmethod
+    def _tag(emp_id):
+        return f"employee:{emp_id}"
+
+    def _cached(self, kind, emp_id, version, load, fresh, *args):
+        key = (kind, str(emp_id), version) + args
+        if not fresh:
+            entry = self._cache.get(key)
+            if entry is not None:
+                return entry[0]
+        value = load(emp_id, *args)
+        # a one-row "result set", so the cache's size accounting applies as is
+        self._cache.put(key, (self._tag(emp_id),), [value])
+        return value
+
+    def _load_credit(self, emp_id):
+        rows = self.db.fetch_data(CREDIT_QUERY, (emp_id,))
+        return Credit(*rows[0]) if rows else NO_CREDIT
+
+    def _load_claims(self, emp_id, page):
+        clause, params = keyset_clause('ClaimID', page)
+        return split_page(self.db.fetch_data(CLAIMS_QUERY.format(page=clause), [emp_id] + params), page)
+
+    def credit(self, emp_id, version=0, fresh=False):
+        """Limits and balances; fresh=True reads through (and refreshes) the cache, e.g. before a balance check."""
+        return self._cached('credit', emp_id, version, self._load_credit, fresh)
+
+    def get(self, emp_id, version=0, page=Page(None, 25), fresh=False):
+        credit = self.credit(emp_id, version, fresh)
+        claims, older_cursor = self._cached('claims', emp_id, version, self._load_claims, fresh, page)
+        return EmployeeSnapshot(credit, claims, older_cursor)
+
+    def invalidate(self, emp_id):
+        self._cache.invalidate((self._tag(str(emp_id)),))
+
+    def stats(self):
+        return self._cache.stats()
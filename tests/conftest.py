@@ -0,0 +1,133 @@
+import importlib
+import io
+import os
+import random
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbconnection import DBConnection  # noqa: E402
+
+
+""" SQLite-backed fixtures """
+
+# the tests run against the SQLite backend, which creates the schema on connect; a file
+# database rather than :memory:, since the pool hands each thread its own connection
+
+# what app.py imports beyond the standard library and this repo
+APP_REQUIREMENTS = ('flask', 'fpdf', 'PIL', 'imagehash', 'dotenv', 'passlib')
+
+
+def sqlite_db(path, **options):
+    return DBConnection(host=None, user=None, password=None, database=str(path), backend='sqlite', **options)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = sqlite_db(tmp_path / 'claims.db')
+    yield db
+    db.disconnect()
+
+
+def add_employee(db, email='emp@example.com', password='x', credit=1000):
+    emp_id = db.execute_query(
+        "INSERT INTO employee (Email, Password, FirstName, LastName) VALUES (%s, %s, %s, %s)",
+        (email, password, 'Emp', 'Loyee'))
+    db.execute_query(
+        "INSERT INTO credit (EmpID, FuelCreditLimit, OPDCreditLimit, FuelCreditBalance, OPDCreditBalance)"
+        " VALUES (%s, %s, %s, %s, %s)",
+        (emp_id, credit, credit, credit, credit))
+    return emp_id
+
+
+def add_admin(db, email='admin@example.com', password='x'):
+    return db.execute_query(
+        "INSERT INTO admin (Email, Password, FirstName, LastName) VALUES (%s, %s, %s, %s)",
+        (email, password, 'Ad', 'Min'))
+
+
+@pytest.fixture
+def employee(db):
+    return add_employee(db)
+
+
+def add_claim(db, emp_id, amount=100, category='Fuel', status='Pending', day=date(2024, 3, 15)):
+    return db.execute_query(
+        "INSERT INTO claim (EmpID, Category, Amount, Status, DateOfRequest) VALUES (%s, %s, %s, %s, %s)",
+        (emp_id, category, amount, status, day))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    for module in APP_REQUIREMENTS:
+        pytest.importorskip(module)
+    os.environ['DB_BACKEND'] = 'sqlite'
+    os.environ['DB_SQLITE_PATH'] = str(tmp_path_factory.mktemp('app') / 'import.db')
+    return importlib.import_module('app')
+
+
+@pytest.fixture
+def app(app_module, db, monkeypatch):
+    """app.py with its database, snapshots and sign-in throttles swapped for this test's."""
+    monkeypatch.setattr(app_module, 'db', db)
+    monkeypatch.setattr(app_module, 'snapshots', app_module.EmployeeSnapshots(db))
+    monkeypatch.setattr(app_module, 'ip_attempts', app_module.TokenBuckets(rate=1, burst=100))
+    monkeypatch.setattr(app_module, 'account_attempts', app_module.TokenBuckets(rate=1, burst=100))
+    app_module.app.config['TESTING'] = True
+    return app_module
+
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+
+def sign_in(client, emp_id=None, admin_id=None):
+    with client.session_transaction() as session:
+        if emp_id is not None:
+            session['emp_id'] = emp_id
+            session['emp_name'] = 'Emp Loyee'
+        if admin_id is not None:
+            session['admin_id'] = admin_id
+            session['admin_name'] = 'Ad Min'
+
+
+def png(seed):
+    """A small noise image; different seeds give different perceptual hashes."""
+    Image = pytest.importorskip('PIL.Image')
+    rng = random.Random(seed)
+    image = Image.new('L', (64, 64))
+    image.putdata([rng.randrange(256) for _ in range(64 * 64)])
+    data = io.BytesIO()
+    image.save(data, format='PNG')
+    return data.getvalue()
+
+
+def submit(client, *images, amount='10'):
+    """POST a claim to emp_form with the given image bytes as invoice0.png, invoice1.png, ..."""
+    data = {'amount': amount, 'category': 'Fuel', 'message': 'fuel',
+            'images[]': [(io.BytesIO(image), f'invoice{n}.png') for n, image in enumerate(images)]}
+    return client.post('/emp_form', data=data, content_type='multipart/form-data')
+
+
+@pytest.fixture
+def uploads(app, tmp_path, monkeypatch):
+    """emp_form saving its images under this test's tmp_path."""
+    folder = tmp_path / 'uploads'
+    folder.mkdir()
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(folder))
+    return folder
+
+
+@pytest.fixture
+def migrations(db, monkeypatch):
+    """dbmigrate.py working on this test's database."""
+    pytest.importorskip('dotenv')
+    monkeypatch.setenv('DB_BACKEND', 'sqlite')
+    monkeypatch.setenv('DB_SQLITE_PATH', db.database)
+    module = importlib.import_module('dbmigrate')
+    monkeypatch.setattr(module, 'db', db)
+    return module
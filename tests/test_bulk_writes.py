@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import add_claim
+
+
+def test_execute_query_returns_insert_id(db, employee):
+    claim_id = add_claim(db, employee)
+    assert claim_id == db.fetch_data("SELECT MAX(ClaimID) FROM claim")[0][0]
+    assert db.execute_query("UPDATE claim SET Status = 'Approved' WHERE ClaimID = %s", (claim_id,)) is None
+
+
+def test_execute_many_returns_ids_in_order(db, employee):
+    claim_ids = [add_claim(db, employee) for _ in range(5)]
+    ids = db.execute_many(
+        "INSERT INTO claimimage (ClaimID, Image, ImageHash) VALUES (%s, %s, %s)",
+        [(claim_id, f"{n}.jpg", f"hash{n}") for n, claim_id in enumerate(claim_ids)], chunk_size=2)
+    rows = db.fetch_data("SELECT ImageID, ClaimID, Image FROM claimimage ORDER BY ImageID")
+    assert [row[0] for row in rows] == ids
+    assert [(row[1], row[2]) for row in rows] == [(claim_id, f"{n}.jpg") for n, claim_id in enumerate(claim_ids)]
+
+
+def test_execute_many_is_all_or_nothing(db, employee):
+    claim_id = add_claim(db, employee)
+    # the second chunk fails on the foreign key; the first must not stay behind
+    with pytest.raises(db.backend.Error):
+        db.execute_many("INSERT INTO claimimage (ClaimID, Image) VALUES (%s, %s)",
+                        [(claim_id, 'a.jpg'), (claim_id, 'b.jpg'), (999, 'c.jpg')], chunk_size=2)
+    assert db.fetch_data("SELECT COUNT(*) FROM claimimage") == [(0,)]
+
+
+def test_execute_many_without_values_clause(db, employee):
+    claim_ids = [add_claim(db, employee) for _ in range(3)]
+    assert db.execute_many("UPDATE claim SET Status = %s WHERE ClaimID = %s",
+                           [('Approved', claim_id) for claim_id in claim_ids]) == []
+    assert db.fetch_data("SELECT COUNT(*) FROM claim WHERE Status = 'Approved'") == [(3,)]
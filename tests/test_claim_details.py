@@ -0,0 +1,82 @@
+from datetime import date
+
+from claimdetails import admin_claim_detail, claim_images, employee_claim_detail
+
+from conftest import add_admin, add_claim, add_employee, sign_in
+
+
+def add_images(db, claim_id, *images):
+    db.execute_many("INSERT INTO claimimage (ClaimID, Image) VALUES (%s, %s)", [(claim_id, image) for image in images])
+
+
+def decide(db, claim_id, admin_id, status='Approved'):
+    db.execute_query("INSERT INTO claimapproval (ClaimID, AdminID, DateOfApproval, AdminMessage) VALUES (%s, %s, %s, %s)",
+                     (claim_id, admin_id, date(2024, 3, 20), 'ok'))
+    db.execute_query("UPDATE claim SET Status = %s WHERE ClaimID = %s", (status, claim_id))
+
+
+def test_claim_images_in_upload_order():
+    assert claim_images(None) == []
+    assert claim_images('[[7, "b.jpg"], [3, "a.jpg"], [9, null]]') == ['a.jpg', 'b.jpg']
+    assert claim_images(b'[[1, "a.jpg"]]') == ['a.jpg']
+
+
+def test_employee_detail_of_decided_claim(db, employee):
+    admin_id = add_admin(db)
+    claim_id = add_claim(db, employee, amount=55)
+    add_images(db, claim_id, 'first.jpg', 'second.jpg')
+    assert employee_claim_detail(db, claim_id, employee) is None
+
+    decide(db, claim_id, admin_id)
+    detail = employee_claim_detail(db, claim_id, employee)
+    assert detail['Images'] == ['first.jpg', 'second.jpg']
+    assert detail['DateOfRequest'] == '15-03-2024'
+    assert detail['Admin']['FirstName'] == 'Ad'
+    assert detail['Approval'] == {'DateOfApproval': '20-03-2024', 'AdminMessage': 'ok'}
+    assert 'EmpID' not in detail and 'Email' not in detail['Employee']
+    # another employee cannot read it
+    assert employee_claim_detail(db, claim_id, employee + 1) is None
+
+
+def test_admin_detail_of_pending_claim(db, employee):
+    claim_id = add_claim(db, employee)
+    detail = admin_claim_detail(db, claim_id)
+    assert detail['EmpID'] == employee
+    assert detail['Employee']['Email'] == 'emp@example.com'
+    assert (detail['Images'], detail['Admin'], detail['Approval']) == ([], None, None)
+    assert admin_claim_detail(db, 999) is None
+
+
+def test_detail_is_one_query_however_many_images(db, employee):
+    claim_id = add_claim(db, employee)
+    add_images(db, claim_id, *[f"{n}.jpg" for n in range(5)])
+    db.begin_request('admin_claim_details')
+    assert len(admin_claim_detail(db, claim_id)['Images']) == 5
+    assert db.end_request()['queries'] == 1
+
+
+def test_employee_endpoint(db, client, employee):
+    claim_id = add_claim(db, employee)
+    decide(db, claim_id, add_admin(db))
+    add_images(db, claim_id, 'receipt.jpg')
+    other = add_employee(db, 'other@example.com')
+    db.release()
+    assert client.get(f'/emp_claim_details/{claim_id}').status_code == 401
+
+    sign_in(client, emp_id=other)
+    assert client.get(f'/emp_claim_details/{claim_id}').status_code == 404
+    sign_in(client, emp_id=employee)
+    response = client.get(f'/emp_claim_details/{claim_id}')
+    assert response.status_code == 200
+    assert response.get_json()['ClaimID'] == claim_id
+    assert response.get_json()['Images'] == ['receipt.jpg']
+
+
+def test_admin_endpoint(db, client, employee):
+    claim_id = add_claim(db, employee)
+    db.release()
+    assert client.get(f'/admin_claim_details/{claim_id}').status_code == 401
+
+    sign_in(client, admin_id=add_admin(db))
+    assert client.get('/admin_claim_details/999').status_code == 404
+    assert client.get(f'/admin_claim_details/{claim_id}').get_json()['Status'] == 'Pending'
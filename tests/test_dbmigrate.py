@@ -0,0 +1,60 @@
+import importlib.util
+import os
+
+import pytest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+def test_migrate_applies_every_version_once(migrations, capsys):
+    assert [version for version, _ in migrations.pending_migrations()] == [1, 2, 3]
+    migrations.migrate()
+    assert migrations.pending_migrations() == []
+    migrations.migrate()
+    assert capsys.readouterr().out.count('applied') == 3
+
+
+def test_paged_queries_are_checked_with_their_keyset_clause(migrations):
+    paged = [query for _, query in migrations.app_queries(APP) if 'ClaimID < %s' in query]
+    assert paged
+    for query in paged:
+        assert ' '.join(query.split()).rstrip(';').endswith('ClaimID DESC LIMIT %s')
+
+
+def test_app_queries_use_indexes_after_migrating(migrations, capsys):
+    migrations.migrate()
+    assert migrations.explain_app_queries(APP) == 0
+    assert "could not EXPLAIN" not in capsys.readouterr().out
+
+
+def migrations_table(db):
+    return db.fetch_data("SELECT name FROM sqlite_master WHERE name = 'schema_migrations'")
+
+
+def test_pending_check_is_read_only(db, migrations):
+    assert len(migrations.pending_migrations()) == len(migrations.MIGRATIONS)
+    assert migrations_table(db) == []
+
+
+class Server:
+    class log:
+        @staticmethod
+        def warning(message, *args):
+            pass
+
+
+def gunicorn_config():
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(os.path.dirname(APP), 'gunicorn.conf.py'))
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    return config
+
+
+def test_gunicorn_refuses_a_stale_schema(db, migrations):
+    config = gunicorn_config()
+    with pytest.raises(SystemExit, match='001 indexes for hot predicates'):
+        config.on_starting(Server())
+    assert migrations_table(db) == []
+
+    migrations.migrate()
+    assert config.on_starting(Server()) is None
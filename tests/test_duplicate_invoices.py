@@ -0,0 +1,79 @@
+import io
+from datetime import date
+
+from conftest import add_claim, png, sign_in, submit
+
+
+def add_image(db, claim_id, image_hash):
+    db.execute_query("INSERT INTO claimimage (ClaimID, Image, ImageHash) VALUES (%s, %s, %s)",
+                     (claim_id, f'{claim_id}_1.png', image_hash))
+
+
+def image_hash(app, image):
+    return app.get_fast_image_hash(app.Image.open(io.BytesIO(image)))
+
+
+def test_approved_match_wins_over_pending_in_one_query(app, db, employee):
+    add_image(db, add_claim(db, employee, status='Pending', day=date(2024, 3, 1)), 'aaaa')
+    add_image(db, add_claim(db, employee, status='Approved', day=date(2024, 2, 1)), 'aaaa')
+    add_image(db, add_claim(db, employee, status='Pending', day=date(2024, 3, 2)), 'bbbb')
+    add_image(db, add_claim(db, employee, status='Rejected', day=date(2024, 3, 3)), 'cccc')
+
+    db.begin_request('emp_form')
+    duplicates = app.find_duplicate_invoices(['bbbb', 'cccc', 'aaaa', 'dddd', 'aaaa'])
+    assert db.end_request()['queries'] == 1
+
+    assert {i: (status, str(day)) for i, (status, day) in duplicates.items()} == {
+        0: ('Pending', '2024-03-02'),
+        2: ('Approved', '2024-02-01'),
+        4: ('Approved', '2024-02-01'),
+    }
+
+
+def test_no_hashes_need_no_query(app, db):
+    db.begin_request('emp_form')
+    assert app.find_duplicate_invoices([]) == {}
+    assert db.end_request()['queries'] == 0
+
+
+def test_emp_form_lists_every_duplicate_image(app, db, client, employee, uploads):
+    approved, pending, fresh = png(1), png(2), png(3)
+    add_image(db, add_claim(db, employee, status='Approved', day=date(2024, 2, 1)), image_hash(app, approved))
+    add_image(db, add_claim(db, employee, status='Pending', day=date(2024, 3, 1)), image_hash(app, pending))
+    sign_in(client, emp_id=employee)
+
+    response = submit(client, fresh, approved, pending)
+
+    assert response.status_code == 400
+    assert response.get_json()['duplicates'] == [
+        {'image': 'invoice1.png', 'status': 'Approved', 'date_of_request': '01 February 2024'},
+        {'image': 'invoice2.png', 'status': 'Pending', 'date_of_request': '01 March 2024'},
+    ]
+    assert 'invoice1.png (approved on 01 February 2024), invoice2.png (pending)' in response.get_json()['error']
+    assert db.fetch_data("SELECT COUNT(*) FROM claim") == [(2,)]
+    assert list(uploads.iterdir()) == []
+
+
+def test_emp_form_single_duplicate_names_the_approval_date(app, db, client, employee, uploads):
+    approved = png(1)
+    add_image(db, add_claim(db, employee, status='Approved', day=date(2024, 2, 1)), image_hash(app, approved))
+    sign_in(client, emp_id=employee)
+
+    response = submit(client, approved)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('This invoice is already approved on 01 February 2024.')
+
+
+def test_emp_form_saves_a_new_claim_and_deducts_the_balance(app, db, client, employee, uploads):
+    rejected = png(1)
+    add_image(db, add_claim(db, employee, status='Rejected'), image_hash(app, rejected))
+    sign_in(client, emp_id=employee)
+
+    assert submit(client, rejected, png(2), amount='40').status_code == 200
+
+    claim_id, amount, status = db.fetch_data(
+        "SELECT ClaimID, Amount, Status FROM claim WHERE Status != 'Rejected'")[0]
+    assert (float(amount), status) == (40, 'Pending')
+    assert db.fetch_data("SELECT COUNT(*) FROM claimimage WHERE ClaimID = %s", (claim_id,)) == [(2,)]
+    assert float(db.fetch_data("SELECT FuelCreditBalance FROM credit WHERE EmpID = %s", (employee,))[0][0]) == 960
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import add_claim, sqlite_db
+
+
+QUERIES = {
+    'claims': "SELECT COUNT(*) FROM claim",
+    'fuel': ("SELECT SUM(Amount) FROM claim WHERE Category = %s", ('Fuel',)),
+    'opd': ("SELECT SUM(Amount) FROM claim WHERE Category = %s", ('OPD',)),
+}
+
+
+@pytest.fixture
+def claims(db, employee):
+    add_claim(db, employee, amount=100, category='Fuel')
+    add_claim(db, employee, amount=40, category='OPD')
+    db.release()
+
+
+def test_fan_out_returns_each_result_by_name(db, claims):
+    results = db.fetch_concurrently(QUERIES)
+    assert results == {'claims': [(2,)], 'fuel': [(100,)], 'opd': [(40,)]}
+    # each worker took its own connection and gave it back
+    stats = db.pool_stats()
+    assert stats['checkouts'] >= 3
+    assert stats['in_use'] == 0
+
+
+def test_fan_out_folds_worker_queries_into_request(db, claims):
+    db.begin_request('dashboard')
+    db.fetch_concurrently(QUERIES)
+    summary = db.end_request()
+    assert summary['queries'] == 3
+    assert summary['rows'] == 3
+
+
+def test_fan_out_raises_a_failed_query(db, claims):
+    with pytest.raises(db.backend.Error):
+        db.fetch_concurrently(dict(QUERIES, broken="SELECT * FROM missing_table"))
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_fan_out_runs_inline_inside_transaction(db, employee):
+    with db.transaction():
+        add_claim(db, employee, amount=100)
+        # the uncommitted claim is only visible on the transaction's own connection
+        assert db.fetch_concurrently(QUERIES)['claims'] == [(1,)]
+
+
+def test_fan_out_without_workers_runs_inline(tmp_path):
+    db = sqlite_db(tmp_path / 'claims.db', fanout_workers=0)
+    assert db.fetch_concurrently(QUERIES)['claims'] == [(0,)]
+    assert db._executor is None
+    db.disconnect()
@@ -0,0 +1,59 @@
+import pytest
+
+from conftest import add_admin, add_claim, add_employee, sign_in
+
+
+def test_fetch_iter_streams_in_batches(db, employee):
+    for amount in range(1, 8):
+        add_claim(db, employee, amount=amount)
+    db.release()
+    rows = db.fetch_iter("SELECT Amount FROM claim ORDER BY ClaimID", batch_size=3, named=True)
+    assert [row.Amount for row in rows] == list(range(1, 8))
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_fetch_iter_returns_connection_when_stopped_early(db, employee):
+    for _ in range(5):
+        add_claim(db, employee)
+    db.release()
+    rows = db.fetch_iter("SELECT ClaimID FROM claim", batch_size=2)
+    next(rows)
+    assert db.pool_stats()['in_use'] == 1
+    rows.close()
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_fetch_iter_allows_queries_inside_transaction(db, employee):
+    for amount in (10, 20, 30):
+        add_claim(db, employee, amount=amount)
+    with db.transaction():
+        for claim_id, amount in db.fetch_iter("SELECT ClaimID, Amount FROM claim ORDER BY ClaimID", batch_size=1):
+            db.execute_query("UPDATE claim SET Amount = %s WHERE ClaimID = %s", (amount * 2, claim_id))
+    assert [row[0] for row in db.fetch_data("SELECT Amount FROM claim ORDER BY ClaimID")] == [20, 40, 60]
+
+
+def test_emp_update_holds_no_connection_after_render(db, client):
+    sign_in(client, admin_id=add_admin(db))
+    add_employee(db, 'someone@example.com')
+    response = client.get('/emp_update')
+    assert response.status_code == 200
+    assert b'someone@example.com' in response.data
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_dashboard_pdf_export_streams_employee_rows(db, client):
+    pytest.importorskip('fpdf')
+    sign_in(client, admin_id=add_admin(db))
+    emp_id = add_employee(db)
+    db.execute_query(
+        "INSERT INTO claimrollup (ClaimYear, ClaimMonth, EmpID, Category, ClaimCount, TotalAmount)"
+        " VALUES (%s, %s, %s, %s, %s, %s)", (2024, 3, emp_id, 'Fuel', 1, 150))
+    response = client.post('/dashboard', data={'month': 3, 'year': 2024, 'download': '1'})
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_dashboard_page_still_renders(db, client):
+    sign_in(client, admin_id=add_admin(db))
+    assert client.get('/dashboard?month=3&year=2024').status_code == 200
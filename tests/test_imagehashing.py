@@ -0,0 +1,62 @@
+import io
+import time
+
+import pytest
+
+from imagehashing import HashingTimeout, ImageHashPool
+
+from conftest import png, sign_in, submit
+
+
+@pytest.fixture
+def pool():
+    pool = ImageHashPool(max_workers=3, max_queue=2, budget=5)
+    yield pool
+    pool.shutdown()
+
+
+def test_results_come_back_in_upload_order(pool):
+    def slow_square(n):
+        time.sleep(0.01 * (5 - n))
+        return n * n
+    assert pool.hash_all(slow_square, range(5)) == [0, 1, 4, 9, 16]
+    assert pool.stats()['images'] == 5
+
+
+def test_first_error_is_raised(pool):
+    def fail_on_two(n):
+        if n == 2:
+            raise ValueError("bad image")
+        return n
+    with pytest.raises(ValueError, match="bad image"):
+        pool.hash_all(fail_on_two, range(4))
+
+
+def test_budget_raises_hashing_timeout():
+    pool = ImageHashPool(max_workers=1, max_queue=0, budget=0.05)
+    with pytest.raises(HashingTimeout):
+        pool.hash_all(lambda n: time.sleep(0.2), range(3))
+    assert pool.stats()['timeouts'] == 1
+    pool.shutdown()
+
+
+def fast_hash(app, image):
+    return app.get_fast_image_hash(app.Image.open(io.BytesIO(image)))
+
+
+def test_emp_form_stores_every_image_hash(app, db, client, employee, uploads):
+    sign_in(client, emp_id=employee)
+    images = [png(1), png(2)]
+    assert submit(client, *images).status_code == 200
+    rows = db.fetch_data("SELECT Image, ImageHash FROM claimimage ORDER BY ImageID")
+    assert [row[1] for row in rows] == [fast_hash(app, image) for image in images]
+    assert rows[0][1] != rows[1][1]
+    assert sorted(path.name for path in uploads.iterdir()) == [row[0] for row in rows]
+
+
+def test_emp_form_answers_503_when_hashing_is_too_slow(app, db, client, employee, uploads, monkeypatch):
+    monkeypatch.setattr(app, 'image_hashes', ImageHashPool(max_workers=1, max_queue=0, budget=0.05))
+    monkeypatch.setattr(app, 'hash_upload', lambda image: time.sleep(0.3))
+    sign_in(client, emp_id=employee)
+    assert submit(client, png(1), png(2)).status_code == 503
+    assert db.fetch_data("SELECT COUNT(*) FROM claim") == [(0,)]
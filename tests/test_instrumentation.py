@@ -0,0 +1,46 @@
+import logging
+
+from dbconnection import fingerprint
+
+from conftest import add_claim, add_employee, sqlite_db
+
+
+def test_fingerprint_groups_literals():
+    assert fingerprint("SELECT * FROM claim WHERE ClaimID = 12 AND Status = 'Approved';") == \
+        fingerprint("SELECT  *  FROM claim WHERE ClaimID = 7 AND Status = 'Rejected'")
+
+
+def test_request_summary_counts_queries_and_repeats(db, employee, caplog):
+    db.repeat_threshold = 2
+    db.begin_request('emp_dashboard')
+    add_claim(db, employee)
+    for claim_id in range(3):
+        db.fetch_data("SELECT * FROM claim WHERE ClaimID = %s", (claim_id,))
+    with caplog.at_level(logging.WARNING, logger='dbconnection'):
+        summary = db.end_request()
+
+    assert summary['endpoint'] == 'emp_dashboard'
+    assert (summary['queries'], summary['writes'], summary['rows']) == (4, 1, 2)
+    assert list(summary['repeated'].values()) == [3]
+    assert "Possible N+1 on emp_dashboard" in caplog.text
+    # the totals are kept per endpoint and statement
+    calls = sorted(stats['calls'] for stats in db.query_stats() if stats['endpoint'] == 'emp_dashboard')
+    assert calls == [1, 3]
+
+
+def test_slow_query_is_logged(tmp_path, caplog):
+    db = sqlite_db(tmp_path / 'claims.db', slow_query_ms=0)
+    with caplog.at_level(logging.WARNING, logger='dbconnection'):
+        db.fetch_data("SELECT 1")
+    assert "Slow query" in caplog.text
+    db.disconnect()
+
+
+def test_response_carries_server_timing(db, client):
+    add_employee(db)
+    db.release()
+    response = client.get('/get_employees')
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert response.headers['Server-Timing'].endswith('desc="1 queries"')
+    assert 'Server-Timing' not in client.get('/health').headers
@@ -0,0 +1,67 @@
+import pytest
+
+from pagination import Page, keyset_clause, page_request, split_page
+from snapshots import EmployeeSnapshots
+
+from conftest import add_claim
+
+
+def test_page_request_defaults_and_caps():
+    datastructures = pytest.importorskip('werkzeug.datastructures')
+    args = datastructures.MultiDict
+    assert page_request(args()) == Page(None, 25)
+    assert page_request(args({'before': '40', 'size': '10'})) == Page(40, 10)
+    assert page_request(args({'size': '5000'}), max_size=100) == Page(None, 100)
+    assert page_request(args({'size': '0'})) == Page(None, 1)
+    assert page_request(args({'before': '-3', 'size': 'x'})) == Page(None, 25)
+    assert page_request(args({'before': 'abc'})) == Page(None, 25)
+
+
+def test_keyset_clause():
+    assert keyset_clause('ClaimID', Page(None, 10)) == (" ORDER BY ClaimID DESC LIMIT %s", [11])
+    assert keyset_clause('c.ClaimID', Page(42, 10)) == (
+        " AND c.ClaimID < %s ORDER BY c.ClaimID DESC LIMIT %s", [42, 11])
+
+
+@pytest.mark.parametrize('count, cursor', [(0, None), (3, None), (4, None), (5, 7)])
+def test_split_page_boundaries(count, cursor):
+    rows = [(claim_id,) for claim_id in range(10, 10 - count, -1)]
+    page, older = split_page(rows, Page(None, 4))
+    assert page == rows[:4]
+    assert older == cursor
+
+
+def pages(db, emp_id, size):
+    """Every page of an employee's claims, following the cursors from the newest."""
+    snapshots = EmployeeSnapshots(db)
+    page, seen = Page(None, size), []
+    while True:
+        snapshot = snapshots.get(emp_id, page=page)
+        seen.append([claim[0] for claim in snapshot.claims])
+        if snapshot.older_cursor is None:
+            return seen
+        page = Page(snapshot.older_cursor, size)
+
+
+@pytest.mark.parametrize('count', [0, 1, 9, 10, 11, 30])
+def test_pages_cover_every_claim_once(db, employee, count):
+    other = db.execute_query("INSERT INTO employee (Email, Password) VALUES (%s, %s)", ('other@example.com', 'x'))
+    claim_ids = []
+    for n in range(count):
+        claim_ids.append(add_claim(db, employee))
+        add_claim(db, other)
+
+    seen = pages(db, employee, 10)
+    assert [claim_id for page in seen for claim_id in page] == sorted(claim_ids, reverse=True)
+    assert all(len(page) == 10 for page in seen[:-1])
+    # an exact multiple of the page size ends without an empty trailing page
+    assert len(seen) == max(-(-count // 10), 1)
+
+
+def test_claim_requests_links_the_older_page(db, client, employee):
+    claim_ids = [add_claim(db, employee) for _ in range(3)]
+    db.release()
+    first = client.get('/claim_requests?size=2').data.decode()
+    assert f'before={claim_ids[1]}' in first
+    older = client.get(f'/claim_requests?size=2&before={claim_ids[1]}').data.decode()
+    assert 'Older' not in older
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('passlib')
+
+from passlib.hash import bcrypt  # noqa: E402
+
+from passwords import HasherBusy, PasswordHasher  # noqa: E402
+from ratelimit import TokenBuckets  # noqa: E402
+
+from conftest import add_employee  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def hasher():
+    hasher = PasswordHasher(rounds=5, max_workers=1, max_queue=0, timeout=30)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify_on_the_pool(hasher):
+    stored = hasher.hash('s3cret')
+    assert stored.startswith('$2b$05$')
+    assert hasher.verify('s3cret', stored)
+    assert not hasher.verify('wrong', stored)
+    # a plain-text or missing stored password never matches
+    assert not hasher.verify('s3cret', 's3cret')
+    assert not hasher.verify('', stored)
+
+
+def test_needs_rehash_below_policy_cost(hasher):
+    assert hasher.needs_rehash(bcrypt.using(rounds=4).hash('x'))
+    assert not hasher.needs_rehash(bcrypt.using(rounds=5).hash('x'))
+    assert not hasher.needs_rehash('plain text')
+
+
+def test_saturated_pool_rejects_at_once(hasher):
+    slow = bcrypt.using(rounds=13).hash('x')
+    calls = hasher.stats()['calls']
+    thread = threading.Thread(target=hasher.verify, args=('x', slow))
+    thread.start()
+    while hasher.stats()['calls'] == calls:
+        time.sleep(0.01)
+    with pytest.raises(HasherBusy):
+        hasher.verify('x', slow)
+    thread.join()
+    assert hasher.stats()['rejected'] == 1
+
+
+def test_token_bucket_allows_burst_then_waits():
+    buckets = TokenBuckets(rate=1, burst=3)
+    assert [buckets.take('ip') for _ in range(3)] == [0, 0, 0]
+    assert 0 < buckets.take('ip') <= 1
+    assert buckets.take('other') == 0
+    buckets.reset('ip')
+    assert buckets.take('ip') == 0
+
+
+def test_token_buckets_keep_at_most_max_keys():
+    buckets = TokenBuckets(rate=0, burst=1, max_keys=2)
+    for key in ('a', 'b', 'c'):
+        buckets.take(key)
+    # 'a' was dropped, so it starts from a full bucket again
+    assert buckets.take('a') == 0
+    assert buckets.take('c') > 0
+
+
+def test_signin_is_throttled_per_client(app, client, monkeypatch):
+    monkeypatch.setattr(app, 'ip_attempts', TokenBuckets(rate=0.01, burst=2))
+    attempt = {'email': 'nobody@example.com', 'password': 'x'}
+    for _ in range(2):
+        assert client.post('/signin', data=attempt, headers={'X-Forwarded-For': '10.0.0.1'}).status_code == 200
+    throttled = client.post('/signin', data=attempt, headers={'X-Forwarded-For': '10.0.0.1'})
+    assert throttled.status_code == 429
+    assert int(throttled.headers['Retry-After']) > 0
+    # behind the trusted proxy another client keeps its own bucket
+    assert client.post('/signin', data=attempt, headers={'X-Forwarded-For': '10.0.0.2'}).status_code == 200
+
+
+def test_busy_hasher_answers_503(app, client, db, monkeypatch):
+    add_employee(db, 'emp@example.com', bcrypt.using(rounds=4).hash('pw'))
+
+    def busy(password, stored_hash):
+        raise HasherBusy("full")
+    monkeypatch.setattr(app.passwords, 'verify', busy)
+    response = client.post('/signin', data={'email': 'emp@example.com', 'password': 'pw'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
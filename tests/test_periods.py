@@ -0,0 +1,79 @@
+from datetime import date, datetime
+
+import pytest
+
+from periods import month_bounds, period_bounds, period_filter, range_bounds, to_date
+
+from conftest import add_claim
+
+
+def test_month_bounds_are_half_open():
+    assert month_bounds(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_bounds('2024', '12') == (date(2024, 12, 1), date(2025, 1, 1))
+
+
+def test_range_includes_last_day():
+    assert range_bounds('2024-03-01', '2024-03-31') == (date(2024, 3, 1), date(2024, 4, 1))
+    assert range_bounds(date(2024, 3, 5), datetime(2024, 3, 5, 18, 30)) == (date(2024, 3, 5), date(2024, 3, 6))
+
+
+def test_period_bounds_selections():
+    assert period_bounds(year=2024) == (date(2024, 1, 1), date(2025, 1, 1))
+    assert period_bounds(year=2024, month=6) == (date(2024, 6, 1), date(2024, 7, 1))
+    # a date range wins over the year and month
+    assert period_bounds(year=2024, month=6, start_date='2023-01-01', end_date='2023-01-01') == (
+        date(2023, 1, 1), date(2023, 1, 2))
+
+
+def test_period_filter_sql_and_params():
+    assert period_filter(year=2024, month=2) == (
+        "DateOfRequest >= %s AND DateOfRequest < %s", [date(2024, 2, 1), date(2024, 3, 1)])
+    assert period_filter('c.DateOfRequest', year=2023)[0] == "c.DateOfRequest >= %s AND c.DateOfRequest < %s"
+
+
+def test_period_filter_selects_last_day_of_month(db, employee):
+    for day in (date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29), date(2024, 3, 1)):
+        add_claim(db, employee, day=day)
+    clause, params = period_filter(year=2024, month=2)
+    rows = db.fetch_data(f"SELECT DateOfRequest FROM claim WHERE {clause} ORDER BY DateOfRequest", params)
+    assert [row[0] for row in rows] == [date(2024, 2, 1), date(2024, 2, 29)]
+
+
+@pytest.mark.parametrize('selection', [
+    {'year': 2024, 'month': 13},
+    {'year': 2024, 'month': 0},
+    {'year': 'abc', 'month': 1},
+    {'year': 2024, 'month': 'abc'},
+    {'month': 5},
+    {},
+    {'start_date': '2024-03-02', 'end_date': '2024-03-01'},
+    {'start_date': '', 'end_date': '2024-03-01'},
+    {'start_date': '2024-03-01'},
+    {'start_date': '2024-02-30', 'end_date': '2024-03-01'},
+])
+def test_period_filter_rejects_invalid_selection(selection):
+    with pytest.raises(ValueError):
+        period_filter(**selection)
+
+
+def test_to_date_requires_a_value():
+    with pytest.raises(ValueError):
+        to_date(None)
+    assert to_date(' 2024-05-06T10:00 ') == date(2024, 5, 6)
+
+
+@pytest.mark.parametrize('month, year', [('13', '2024'), ('abc', '2024'), ('3', 'x')])
+def test_stationary_rejects_invalid_month_or_year(db, client, month, year):
+    response = client.post('/stationary', data={'month': month, 'year': year})
+    assert response.status_code == 400
+    assert b'Please select a valid month and year.' in response.data
+
+
+def test_stationary_lists_the_selected_month(db, client, employee):
+    # the last day of February is in February; the first of March is not
+    add_claim(db, employee, amount=30, category='Stationary', status='Approved', day=date(2024, 2, 29))
+    add_claim(db, employee, amount=99, category='Stationary', status='Approved', day=date(2024, 3, 1))
+    february = client.post('/stationary', data={'month': '2', 'year': '2024'})
+    assert february.status_code == 200
+    assert b'Loyee' in february.data
+    assert b'Loyee' not in client.post('/stationary', data={'month': '4', 'year': '2024'}).data
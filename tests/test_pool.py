@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from dbconnection import PoolError
+
+from conftest import sqlite_db
+
+
+@pytest.fixture
+def pool(tmp_path):
+    db = sqlite_db(tmp_path / 'pool.db', pool_min_size=0, pool_max_size=2, pool_timeout=0.2)
+    yield db
+    db.disconnect()
+
+
+def hold_connection(db, held, done):
+    """Check out a connection on a new thread and keep it until done is set."""
+    def run():
+        db.checkout()
+        held.release()
+        done.wait()
+        db.release()
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_connection_is_bound_to_thread_until_release(pool):
+    connection = pool.checkout()
+    assert pool.checkout() is connection
+    other = []
+    thread = threading.Thread(target=lambda: (other.append(pool.checkout()), pool.release()))
+    thread.start()
+    thread.join()
+    assert other[0] is not connection
+
+    pool.release()
+    assert pool.pool_stats()['in_use'] == 0
+    # the idle connection is handed out again rather than a new one opened
+    assert pool.checkout() in (connection, other[0])
+    assert pool.pool_stats()['size'] == 2
+    pool.release()
+
+
+def test_pool_never_exceeds_max_size(pool):
+    held, done = threading.Semaphore(0), threading.Event()
+    threads = [hold_connection(pool, held, done) for _ in range(2)]
+    held.acquire()
+    held.acquire()
+    try:
+        assert pool.pool_stats()['in_use'] == 2
+        with pytest.raises(PoolError):
+            pool.checkout()
+        stats = pool.pool_stats()
+        assert stats['size'] == 2
+        assert stats['waits'] == 1
+        assert stats['timeouts'] == 1
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    assert pool.pool_stats()['in_use'] == 0
+
+
+def test_waiter_gets_released_connection(pool):
+    held, done = threading.Semaphore(0), threading.Event()
+    threads = [hold_connection(pool, held, done) for _ in range(2)]
+    held.acquire()
+    held.acquire()
+    threading.Timer(0.05, done.set).start()
+    connection = pool.checkout(timeout=5)
+    assert connection is not None
+    assert pool.pool_stats()['waits'] == 1
+    assert pool.pool_stats()['timeouts'] == 0
+    pool.release()
+    for thread in threads:
+        thread.join()
+
+
+def test_stats_count_checkouts(pool):
+    for _ in range(3):
+        pool.fetch_data("SELECT 1")
+        pool.release()
+    stats = pool.pool_stats()
+    assert stats['checkouts'] == 3
+    assert (stats['size'], stats['idle'], stats['in_use']) == (1, 1, 0)
+    assert stats['max_size'] == 2
+
+
+def test_connect_opens_min_size(tmp_path):
+    db = sqlite_db(tmp_path / 'pool.db', pool_min_size=2, pool_max_size=3)
+    db.connect()
+    assert db.pool_stats()['idle'] == 2
+    db.disconnect()
+    assert db.pool_stats()['size'] == 0
+
+
+def test_request_teardown_releases_connection(app, client, db):
+    assert client.get('/health').status_code == 200
+    client.post('/signin', data={'email': 'nobody@example.com', 'password': 'x'})
+    stats = db.pool_stats()
+    assert stats['checkouts'] >= 1
+    assert stats['in_use'] == 0
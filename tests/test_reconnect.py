@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from dbbackends import SQLiteBackend
+from dbconnection import ConnectError, DBConnection
+
+
+class DroppingBackend(SQLiteBackend):
+    """SQLite, with a closed connection treated the way MySQL treats a dropped one."""
+
+    disconnect_errors = (sqlite3.ProgrammingError,)
+
+    def __init__(self, failures=0):
+        self.failures = failures
+
+    def connect(self, host, user, password, database, port):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("server has gone away")
+        return super().connect(host, user, password, database, port)
+
+
+def make_db(tmp_path, backend, **options):
+    return DBConnection(host=None, user=None, password=None, database=str(tmp_path / 'claims.db'),
+                        backend=backend, backoff=0, **options)
+
+
+def drop(connection):
+    # closing the sqlite handle underneath makes the next statement fail like a dead socket
+    connection._connection.close()
+
+
+def test_idle_connection_is_pinged_and_replaced(tmp_path):
+    db = make_db(tmp_path, DroppingBackend(), ping_interval=0)
+    connection = db.checkout()
+    db.release()
+    drop(connection)
+
+    assert db.fetch_data("SELECT 1") == [(1,)]
+    assert db.checkout() is not connection
+    stats = db.pool_stats()
+    assert (stats['pings'], stats['ping_failures'], stats['reconnects']) == (1, 1, 1)
+    assert stats['size'] == 1
+    db.disconnect()
+
+
+def test_read_is_replayed_once_on_a_fresh_connection(tmp_path):
+    db = make_db(tmp_path, DroppingBackend(), ping_interval=3600)
+    drop(db.checkout())
+
+    assert db.fetch_data("SELECT 1") == [(1,)]
+    stats = db.pool_stats()
+    assert stats['retries'] == 1
+    assert stats['size'] == 1
+    db.disconnect()
+
+
+def test_write_is_not_replayed(tmp_path):
+    db = make_db(tmp_path, DroppingBackend(), ping_interval=3600)
+    drop(db.checkout())
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.execute_query("INSERT INTO admin (Email, Password) VALUES (%s, %s)", ('a@example.com', 'x'))
+    assert db.pool_stats()['retries'] == 0
+    # the dead connection gave up its slot
+    assert db.pool_stats()['size'] == 0
+    db.disconnect()
+
+
+def test_connect_retries_then_succeeds(tmp_path):
+    db = make_db(tmp_path, DroppingBackend(failures=2), connect_attempts=3)
+    assert db.fetch_data("SELECT 1") == [(1,)]
+    db.disconnect()
+
+
+def test_connect_gives_up_after_attempts(tmp_path):
+    db = make_db(tmp_path, DroppingBackend(failures=3), connect_attempts=3)
+    with pytest.raises(ConnectError):
+        db.fetch_data("SELECT 1")
+    assert db.pool_stats()['size'] == 0
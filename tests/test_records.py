@@ -0,0 +1,16 @@
+from dbconnection import record_class
+
+from conftest import add_claim
+
+
+def test_named_rows_read_by_column(db, employee):
+    add_claim(db, employee, amount=75)
+    row = db.fetch_data("SELECT ClaimID, Amount, Category AS Kind FROM claim", named=True)[0]
+    assert (row.Amount, row.Kind) == (75, 'Fuel')
+    assert tuple(row) == (row.ClaimID, 75, 'Fuel')
+    assert not hasattr(row, '__dict__')
+
+
+def test_record_class_is_shared_and_renames_bad_columns():
+    assert record_class(('a', 'b')) is record_class(('a', 'b'))
+    assert record_class(('COUNT(*)', 'a', 'a'))._fields == ('_0', 'a', '_2')
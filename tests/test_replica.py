@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import add_admin, add_claim, add_employee, sign_in, sqlite_db
+
+
+@pytest.fixture
+def replica(db, tmp_path, monkeypatch):
+    """A second SQLite database standing in for the replica, reporting no lag."""
+    replica = sqlite_db(tmp_path / 'replica.db', pool_min_size=0)
+    replica._primary = db
+    monkeypatch.setattr(db, 'replica', replica)
+    monkeypatch.setattr(db, '_measure_replica_lag', lambda: 0.0)
+    # tell the two databases apart by their admin rows
+    add_admin(db, 'primary@example.com')
+    add_admin(replica, 'replica@example.com')
+    db.release()
+    yield replica
+    replica.disconnect()
+
+
+QUERY = "SELECT Email FROM admin"
+
+
+def source(db, **options):
+    return db.fetch_data(QUERY, replica=True, **options)[0][0].split('@')[0]
+
+
+def test_replica_reads_go_to_replica(db, replica):
+    assert source(db) == 'replica'
+    assert db.fetch_data(QUERY)[0][0] == 'primary@example.com'
+    assert db.replica_stats()['reads'] == 1
+
+
+def test_lagging_replica_falls_back_to_primary(db, replica, monkeypatch):
+    monkeypatch.setattr(db, '_measure_replica_lag', lambda: db.max_replica_lag + 1)
+    assert source(db) == 'primary'
+    assert db.replica_stats()['lag_fallbacks'] == 1
+
+
+def test_request_that_wrote_reads_primary(db, replica, employee):
+    db.begin_request('update_claim')
+    add_claim(db, employee)
+    assert source(db) == 'primary'
+    db.end_request()
+
+
+def test_pinned_request_reads_primary(db, replica):
+    db.begin_request('emp_dashboard', pin_primary=True)
+    assert source(db) == 'primary'
+    db.end_request()
+    assert db.replica_stats()['pinned_to_primary'] == 1
+
+
+def test_pinned_request_skips_cached_replica_rows(db, replica):
+    db.begin_request('dashboard')
+    assert source(db, cache=True) == 'replica'
+    db.end_request()
+
+    db.begin_request('dashboard', pin_primary=True)
+    assert source(db, cache=True) == 'primary'
+    db.end_request()
+
+    db.begin_request('update_claim')
+    db.execute_query("UPDATE admin SET FirstName = 'A'")
+    assert source(db, cache=True) == 'primary'
+    db.end_request()
+
+
+def test_replica_and_primary_reads_are_cached_apart(db, replica):
+    assert source(db, cache=True) == 'replica'
+    assert db.fetch_data(QUERY, cache=True)[0][0] == 'primary@example.com'
+
+
+def test_session_is_pinned_after_a_write_only_with_replica(db, client, monkeypatch):
+    sign_in(client, admin_id=add_admin(db))
+    claim_id = add_claim(db, add_employee(db))
+    db.release()
+
+    client.post('/update_status', data={'claim_id': claim_id, 'status': 'Approved'})
+    with client.session_transaction() as session:
+        assert 'db_pinned_until' not in session
+
+    monkeypatch.setattr(db, 'replica', sqlite_db(db.database + '.replica', pool_min_size=0))
+    client.post('/update_status', data={'claim_id': claim_id, 'status': 'Approved'})
+    with client.session_transaction() as session:
+        assert 'db_pinned_until' in session
+    db.replica.disconnect()
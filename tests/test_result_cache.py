@@ -0,0 +1,53 @@
+from dbconnection import ResultCache, read_tables
+
+from conftest import add_claim
+
+COUNT = "SELECT COUNT(*) FROM claim c JOIN employee e ON e.EmpID = c.EmpID WHERE c.EmpID = %s"
+
+
+def test_read_tables_covers_joins():
+    assert read_tables(COUNT) == {'claim', 'employee'}
+
+
+def test_entries_expire_and_evict():
+    cache = ResultCache(max_entries=2, ttl=30)
+    cache.put('a', ('claim',), [(1,)])
+    cache.put('expired', ('claim',), [(2,)], ttl=-1)
+    assert cache.get('expired') is None
+    cache.put('b', ('claim',), [(3,)])
+    cache.put('c', ('claim',), [(4,)])
+    assert cache.get('a') is None
+    assert cache.get('c') == [(4,)]
+    assert cache.stats()['evictions'] == 1
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = ResultCache()
+    cache.put('claims', ('claim',), [(1,)])
+    cache.put('admins', ('admin',), [(2,)])
+    cache.invalidate(('claim',))
+    assert cache.get('claims') is None
+    assert cache.get('admins') == [(2,)]
+
+
+def test_cached_read_is_invalidated_by_write(db, employee):
+    assert db.fetch_data(COUNT, (employee,), cache=True) == [(0,)]
+    add_claim(db, employee)
+    assert db.fetch_data(COUNT, (employee,), cache=True) == [(1,)]
+    assert db.result_cache_stats()['invalidations'] == 1
+
+
+def test_cached_read_is_invalidated_at_commit(db, employee):
+    assert db.fetch_data(COUNT, (employee,), cache=True) == [(0,)]
+    with db.transaction():
+        add_claim(db, employee)
+        # reads inside the transaction neither use nor fill the cache
+        assert db.fetch_data(COUNT, (employee,), cache=True) == [(1,)]
+    assert db.fetch_data(COUNT, (employee,), cache=True) == [(1,)]
+
+
+def test_cache_hit_skips_the_database(db, employee):
+    db.fetch_data(COUNT, (employee,), cache=True)
+    db.begin_request('dashboard')
+    db.fetch_data(COUNT, (employee,), cache=True)
+    assert db.end_request()['queries'] == 0
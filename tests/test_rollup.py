@@ -0,0 +1,138 @@
+import random
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+import rollup
+
+from conftest import add_claim
+
+
+def rollup_rows(db):
+    return {
+        tuple(row[:4]): (row[4], Decimal(str(row[5])))
+        for row in db.fetch_data(
+            "SELECT ClaimYear, ClaimMonth, EmpID, Category, ClaimCount, TotalAmount FROM claimrollup")
+        if row[4]
+    }
+
+
+def change(db, claim_id, query, params):
+    with db.transaction(), rollup.track_claim(db, claim_id):
+        db.execute_query(query, params)
+
+
+def approve(db, claim_id):
+    change(db, claim_id, "UPDATE claim SET Status = 'Approved' WHERE ClaimID = %s", (claim_id,))
+
+
+def test_pending_claim_is_not_counted(db, employee):
+    add_claim(db, employee)
+    assert rollup_rows(db) == {}
+
+
+def test_approval_adds_claim(db, employee):
+    claim_id = add_claim(db, employee, amount=120.5)
+    approve(db, claim_id)
+    assert rollup_rows(db) == {(2024, 3, employee, 'Fuel'): (1, Decimal('120.5'))}
+
+
+def test_amount_edit_moves_difference(db, employee):
+    first = add_claim(db, employee, amount=100)
+    second = add_claim(db, employee, amount=50)
+    approve(db, first)
+    approve(db, second)
+    change(db, first, "UPDATE claim SET Amount = %s WHERE ClaimID = %s", (80, first))
+    assert rollup_rows(db) == {(2024, 3, employee, 'Fuel'): (2, Decimal('130'))}
+
+
+def test_date_and_category_change_move_buckets(db, employee):
+    claim_id = add_claim(db, employee, amount=100)
+    approve(db, claim_id)
+    change(db, claim_id, "UPDATE claim SET DateOfRequest = %s, Category = %s WHERE ClaimID = %s",
+           (date(2024, 4, 2), 'OPD', claim_id))
+    assert rollup_rows(db) == {(2024, 4, employee, 'OPD'): (1, Decimal('100'))}
+
+
+def test_reject_and_delete_remove_claim(db, employee):
+    rejected = add_claim(db, employee, amount=100)
+    deleted = add_claim(db, employee, amount=40)
+    approve(db, rejected)
+    approve(db, deleted)
+    change(db, rejected, "UPDATE claim SET Status = 'Rejected' WHERE ClaimID = %s", (rejected,))
+    assert rollup_rows(db) == {(2024, 3, employee, 'Fuel'): (1, Decimal('40'))}
+    change(db, deleted, "DELETE FROM claim WHERE ClaimID = %s", (deleted,))
+    assert rollup_rows(db) == {}
+
+
+def test_rolled_back_change_leaves_rollup_alone(db, employee):
+    claim_id = add_claim(db, employee)
+    try:
+        with db.transaction(), rollup.track_claim(db, claim_id):
+            db.execute_query("UPDATE claim SET Status = 'Approved' WHERE ClaimID = %s", (claim_id,))
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert rollup_rows(db) == {}
+    assert rollup.check(db) == []
+
+
+def test_random_transitions_match_claim(db, employee):
+    rng = random.Random(7)
+    claims = [
+        add_claim(db, employee, amount=rng.randint(1, 500), category=rng.choice(['Fuel', 'OPD']),
+                  day=date(2023, 11, 1) + timedelta(days=rng.randint(0, 150)))
+        for _ in range(30)
+    ]
+    for _ in range(200):
+        claim_id = rng.choice(claims)
+        query, params = rng.choice([
+            ("UPDATE claim SET Status = %s WHERE ClaimID = %s", (rng.choice(['Approved', 'Rejected', 'Pending']), claim_id)),
+            ("UPDATE claim SET Amount = %s WHERE ClaimID = %s", (rng.randint(1, 500), claim_id)),
+            ("UPDATE claim SET DateOfRequest = %s WHERE ClaimID = %s",
+             (date(2023, 11, 1) + timedelta(days=rng.randint(0, 150)), claim_id)),
+        ])
+        change(db, claim_id, query, params)
+    assert rollup.check(db) == []
+
+    # category_totals agrees with a plain SUM over claim, whole months or not
+    for start, end in [(date(2023, 11, 1), date(2024, 4, 1)), (date(2023, 11, 17), date(2024, 2, 9)),
+                       (date(2024, 1, 5), date(2024, 1, 20)), (date(2023, 12, 1), date(2024, 1, 1))]:
+        expected = {
+            category: Decimal(str(total)).quantize(rollup.CENT)
+            for category, total in db.fetch_data(
+                "SELECT Category, SUM(Amount) FROM claim WHERE Status = 'Approved'"
+                " AND DateOfRequest >= %s AND DateOfRequest < %s GROUP BY Category", (start, end))
+        }
+        totals = rollup.category_totals(db, start, end)
+        assert {category: Decimal(str(total)).quantize(rollup.CENT) for category, total in totals.items()
+                if total} == expected
+
+
+def test_parallel_writers_keep_rollup_exact(db, employee):
+    claims = [add_claim(db, employee, amount=10 + n, category=('Fuel', 'OPD')[n % 2]) for n in range(40)]
+    db.release()
+    errors = []
+
+    def write(claim_id, statuses):
+        try:
+            for status in statuses:
+                change(db, claim_id, "UPDATE claim SET Status = %s WHERE ClaimID = %s", (status, claim_id))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.release()
+
+    # every claim ends approved; half of them pass through a rejection on the way
+    threads = [
+        threading.Thread(target=write, args=(claim_id, ['Approved', 'Rejected', 'Approved'] if n % 2 else ['Approved']))
+        for n, claim_id in enumerate(claims)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert rollup.check(db) == []
+    assert sum(count for count, _ in rollup_rows(db).values()) == 40
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+pytest.importorskip('passlib')
+
+from passlib.hash import bcrypt  # noqa: E402
+
+from passwords import PasswordHasher  # noqa: E402
+
+from conftest import add_admin, add_employee  # noqa: E402
+
+
+@pytest.fixture
+def hasher(app, monkeypatch):
+    hasher = PasswordHasher(rounds=5, max_workers=1, max_queue=2)
+    monkeypatch.setattr(app, 'passwords', hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+def digest(password, rounds=5):
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def sign_in(client, email, password):
+    return client.post('/signin', data={'email': email, 'password': password}).get_json()
+
+
+def test_employee_signs_in(db, client, hasher):
+    emp_id = add_employee(db, 'emp@example.com', digest('pw'))
+    assert sign_in(client, 'emp@example.com', 'pw')['redirect'] == '/emp_dashboard'
+    with client.session_transaction() as session:
+        assert session['emp_id'] == emp_id
+
+
+def test_signin_is_one_lookup(db, client, hasher):
+    add_employee(db, 'emp@example.com', digest('pw'))
+    db.release()
+    response = client.post('/signin', data={'email': 'emp@example.com', 'password': 'pw'})
+    assert response.headers['Server-Timing'].endswith('desc="1 queries"')
+
+
+def test_admin_account_wins_over_employee(db, client, hasher):
+    add_employee(db, 'both@example.com', digest('emp'))
+    admin_id = add_admin(db, 'both@example.com', digest('admin'))
+    assert sign_in(client, 'both@example.com', 'admin')['redirect'] == '/dashboard'
+    with client.session_transaction() as session:
+        assert session['admin_id'] == admin_id
+        assert 'emp_id' not in session
+
+
+def test_wrong_password_and_unknown_account(db, client, hasher):
+    add_employee(db, 'emp@example.com', digest('pw'))
+    assert sign_in(client, 'emp@example.com', 'nope')['error'] == "Password is incorrect. Try again."
+    assert 'not registered' in sign_in(client, 'who@example.com', 'pw')['error']
+
+
+def test_weak_hash_is_upgraded_after_signin(db, client, hasher):
+    emp_id = add_employee(db, 'emp@example.com', digest('pw', rounds=4))
+    assert sign_in(client, 'emp@example.com', 'pw')['success']
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        stored = db.fetch_data("SELECT Password FROM employee WHERE EmpID = %s", (emp_id,))[0][0]
+        db.release()
+        if not hasher.needs_rehash(stored):
+            break
+        time.sleep(0.05)
+    assert stored.startswith('$2b$05$')
+    assert bcrypt.verify('pw', stored)
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from snapshots import NO_CREDIT, EmployeeSnapshots
+
+from conftest import add_claim, sign_in
+
+
+def queries_for(db, action):
+    db.begin_request('emp_dashboard')
+    result = action()
+    return result, db.end_request()['queries']
+
+
+def test_snapshot_loads_credit_and_claims(db, employee):
+    first = add_claim(db, employee, amount=10)
+    second = add_claim(db, employee, amount=20)
+    snapshot, queries = queries_for(db, lambda: EmployeeSnapshots(db).get(employee))
+    assert snapshot.credit.fuel_credit_balance == Decimal('1000')
+    assert [claim[0] for claim in snapshot.claims] == [second, first]
+    assert snapshot.older_cursor is None
+    assert queries == 2
+
+
+def test_employee_without_credit_row(db):
+    assert EmployeeSnapshots(db).get(12345).credit == NO_CREDIT
+
+
+def test_snapshot_is_cached_until_invalidated(db, employee):
+    snapshots = EmployeeSnapshots(db)
+    snapshots.get(employee)
+    add_claim(db, employee)
+    snapshot, queries = queries_for(db, lambda: snapshots.get(employee))
+    assert (len(snapshot.claims), queries) == (0, 0)
+
+    snapshots.invalidate(employee)
+    snapshot, queries = queries_for(db, lambda: snapshots.get(employee))
+    assert (len(snapshot.claims), queries) == (1, 2)
+
+
+def test_new_version_or_fresh_reads_through(db, employee):
+    snapshots = EmployeeSnapshots(db)
+    snapshots.get(employee)
+    add_claim(db, employee)
+    assert len(snapshots.get(employee, version=1).claims) == 1
+    db.execute_query("UPDATE credit SET FuelCreditBalance = 5 WHERE EmpID = %s", (employee,))
+    assert snapshots.credit(employee, version=1).fuel_credit_balance == Decimal('1000')
+    assert snapshots.credit(employee, version=1, fresh=True).fuel_credit_balance == Decimal('5')
+
+
+def test_dashboard_shows_own_changes_at_once(db, client, employee):
+    sign_in(client, emp_id=employee)
+    claim_id = add_claim(db, employee, amount=321)
+    db.release()
+    page = client.get('/emp_dashboard').data
+    assert b'321' in page and b'1321' not in page
+
+    # the delete refunds the fuel balance; the cached snapshot must not hide it
+    assert client.delete(f'/delete_claim/{claim_id}').status_code == 200
+    assert b'1321' in client.get('/emp_dashboard').data
@@ -0,0 +1,54 @@
+import threading
+
+from dbbackends import translate_mysql
+
+from conftest import add_claim, sqlite_db
+
+
+def test_translate_mysql_dialect():
+    assert translate_mysql("SELECT * FROM claim WHERE MONTH(DateOfRequest) = %s") == \
+        "SELECT * FROM claim WHERE CAST(strftime('%m', DateOfRequest) AS INTEGER) = ?"
+    assert translate_mysql("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = b + VALUES(b)") == \
+        "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = b + excluded.b"
+    assert translate_mysql("SELECT NOW()") == "SELECT datetime('now', 'localtime')"
+
+
+def test_file_database_uses_wal(db):
+    assert db.fetch_data("PRAGMA journal_mode") == [('wal',)]
+
+
+def test_memory_database_is_shared_by_the_pool():
+    db = sqlite_db(':memory:')
+    db.execute_query("INSERT INTO admin (Email, Password) VALUES (%s, %s)", ('a@example.com', 'x'))
+    seen = []
+    thread = threading.Thread(target=lambda: (seen.extend(db.fetch_data("SELECT Email FROM admin")), db.release()))
+    thread.start()
+    thread.join()
+    assert seen == [('a@example.com',)]
+    db.disconnect()
+
+
+def test_read_then_write_transactions_serialise(db, employee):
+    # each transaction reads the amount and writes it back incremented; a deferred
+    # BEGIN would fail some of them with "database is locked" or lose updates
+    claim_id = add_claim(db, employee, amount=0)
+    db.release()
+    errors = []
+
+    def bump():
+        try:
+            with db.transaction():
+                amount = db.fetch_data("SELECT Amount FROM claim WHERE ClaimID = %s", (claim_id,))[0][0]
+                db.execute_query("UPDATE claim SET Amount = %s WHERE ClaimID = %s", (amount + 1, claim_id))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.release()
+
+    threads = [threading.Thread(target=bump) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert db.fetch_data("SELECT Amount FROM claim WHERE ClaimID = %s", (claim_id,)) == [(20,)]
@@ -0,0 +1,47 @@
+from dbconnection import StatementCache
+
+from conftest import sqlite_db
+
+
+class FakeConnection:
+    def cursor(self, prepared=False):
+        return object()
+
+
+def test_statement_cache_executes_first_query_object():
+    cache = StatementCache(FakeConnection(), size=2)
+    first = "SELECT * FROM claim WHERE ClaimID = %s"
+    cursor, statement, hit, _ = cache.get(first)
+    assert statement is first and not hit
+
+    # an equal string built per call gets the cached cursor and the original object
+    again = "".join(["SELECT * FROM claim ", "WHERE ClaimID = %s"])
+    assert again is not first
+    assert cache.get(again) == (cursor, first, True, 0)
+
+
+def test_statement_cache_evicts_least_recently_used():
+    cache = StatementCache(FakeConnection(), size=2)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    assert cache.get("c")[3] == 1
+    assert cache.get("a")[2] is True
+    assert cache.get("b")[2] is False
+
+
+def test_statement_cache_is_off_by_default(db, employee):
+    db.fetch_data("SELECT * FROM claim WHERE EmpID = %s", (employee,))
+    stats = db.statement_cache_stats()
+    assert (stats['capacity'], stats['cached'], stats['hits'], stats['misses']) == (0, 0, 0, 0)
+
+
+def test_statement_cache_reuses_statements_when_enabled(tmp_path):
+    db = sqlite_db(tmp_path / 'claims.db', statement_cache_size=8)
+    for emp_id in range(3):
+        db.fetch_data("SELECT * FROM claim WHERE EmpID = %s", (emp_id,))
+    db.fetch_data("SELECT COUNT(*) FROM claim")
+    stats = db.statement_cache_stats()
+    # statements without params use the text protocol and are not cached
+    assert (stats['cached'], stats['hits'], stats['misses']) == (1, 2, 1)
+    db.disconnect()
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+
+from conftest import add_admin, add_claim, sign_in
+
+
+def claim_count(db):
+    return db.fetch_data("SELECT COUNT(*) FROM claim")[0][0]
+
+
+def test_transaction_commits_on_exit(db, employee):
+    with db.transaction():
+        add_claim(db, employee)
+        add_claim(db, employee)
+    assert claim_count(db) == 2
+    assert not db.in_transaction()
+
+
+def test_transaction_rolls_back_on_exception(db, employee):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            add_claim(db, employee)
+            raise RuntimeError("boom")
+    assert claim_count(db) == 0
+    assert not db.in_transaction()
+
+
+def test_transaction_rolls_back_on_failed_statement(db, employee):
+    with pytest.raises(db.backend.Error):
+        with db.transaction():
+            add_claim(db, employee)
+            db.execute_query("INSERT INTO claim (EmpID, Category, Amount) VALUES (%s, %s, %s)", (employee, 'Fuel', None))
+    assert claim_count(db) == 0
+
+
+def test_transaction_commits_on_early_return(db, employee):
+    # a return inside the block is a normal exit: the writes before it are kept
+    def submit():
+        with db.transaction():
+            add_claim(db, employee)
+            return 'done'
+
+    assert submit() == 'done'
+    assert claim_count(db) == 1
+    assert not db.in_transaction()
+
+
+def test_nested_transaction_joins_outermost(db, employee):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            add_claim(db, employee)
+            with db.transaction():
+                add_claim(db, employee)
+            raise RuntimeError("boom")
+    assert claim_count(db) == 0
+
+
+def update_status(client, claim_id, status):
+    return client.post('/update_status', data={'claim_id': claim_id, 'status': status, 'admin_message': 'ok'})
+
+
+def approval_count(db):
+    return db.fetch_data("SELECT COUNT(*) FROM claimapproval")[0][0]
+
+
+def test_update_status_rejects_and_refunds(db, client, employee):
+    sign_in(client, admin_id=add_admin(db))
+    claim_id = add_claim(db, employee, amount=250, category='OPD')
+    assert update_status(client, claim_id, 'Rejected').status_code == 200
+    assert db.fetch_data("SELECT Status FROM claim WHERE ClaimID = %s", (claim_id,)) == [('Rejected',)]
+    assert db.fetch_data("SELECT OPDCreditBalance FROM credit WHERE EmpID = %s", (employee,)) == [(Decimal('1250'),)]
+    assert approval_count(db) == 1
+
+
+def test_update_status_errors_write_nothing(db, client, employee):
+    sign_in(client, admin_id=add_admin(db))
+    assert update_status(client, 999, 'Approved').status_code == 404
+    claim_id = add_claim(db, employee, category='Travel')
+    assert update_status(client, claim_id, 'Rejected').status_code == 400
+    assert approval_count(db) == 0
+    assert db.fetch_data("SELECT Status FROM claim WHERE ClaimID = %s", (claim_id,)) == [('Pending',)]